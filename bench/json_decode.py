@@ -0,0 +1,85 @@
+"""
+JSON 解码微基准：对比标准库 json 与 orjson 从原始字节解析五类接口响应的耗时。
+
+用法:
+    python bench/json_decode.py                 # 使用按接口结构合成的响应
+    python bench/json_decode.py 60s.json ...    # 使用录制的真实响应文件
+
+仓库中没有录制的接口响应，默认数据按各接口 JSON 结构合成，条目数取偏大的值；
+如需贴近线上结果，可先用 curl 保存 `?format=json` 的响应再传入。
+"""
+
+import json
+import os
+import sys
+import timeit
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def synth_payloads() -> dict:
+    """按接口结构合成响应字节"""
+
+    def wrap(data):
+        return json.dumps({"code": 200, "msg": "success", "data": data}, ensure_ascii=False).encode("utf-8")
+
+    return {
+        "60s": wrap({
+            "date": "2026-10-18",
+            "news": [f"第{i}条新闻：" + "某地发布重要通知，相关部门表示将持续推进。" * 3 for i in range(15)],
+            "tip": "生活不是等待风暴过去，而是学会在雨中跳舞。",
+            "image": "https://example.com/60s/2026-10-18.png",
+            "cover": "https://example.com/60s/cover.jpg",
+        }),
+        "moyu": wrap({"date": "2026-10-18", "image": "https://example.com/moyu.png", "text": "摸鱼办提醒您：" * 20}),
+        "jinjia": wrap({
+            "date": "2026-10-18",
+            "list": [{"name": f"品牌{i}", "price": 600 + i, "unit": "元/克", "change": "+1.2"} for i in range(60)],
+            "image": "https://example.com/jinjia.png",
+        }),
+        "aizixun": wrap({
+            "date": "2026-10-18",
+            "list": [{"title": f"AI资讯标题{i}", "summary": "模型发布与行业动态摘要。" * 8, "url": f"https://example.com/a/{i}"} for i in range(40)],
+            "image": "https://example.com/ai.png",
+        }),
+        "history": wrap({
+            "date": "10-18",
+            "list": [{"year": 1000 + i * 5, "title": f"历史事件{i}", "desc": "这一天发生了值得记录的事件。" * 10} for i in range(200)],
+            "image": "https://example.com/history.png",
+        }),
+    }
+
+
+def load_files(paths) -> dict:
+    payloads = {}
+    for p in paths:
+        with open(p, "rb") as f:
+            payloads[os.path.splitext(os.path.basename(p))[0]] = f.read()
+    return payloads
+
+
+def bench(raw: bytes, fn, number: int) -> float:
+    """返回单次解析的平均耗时（微秒），取 5 轮中的最小值"""
+    return min(timeit.repeat(lambda: fn(raw), number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    payloads = load_files(sys.argv[1:]) if len(sys.argv) > 1 else synth_payloads()
+    if orjson is None:
+        print("未安装 orjson，仅输出标准库结果（pip install orjson）")
+    print(f"{'接口':<10}{'大小(KB)':>10}{'json(us)':>12}{'orjson(us)':>12}{'加速':>8}")
+    for name, raw in payloads.items():
+        number = max(50, int(2_000_000 / max(len(raw), 1)))
+        t_std = bench(raw, json.loads, number)
+        if orjson is not None:
+            t_fast = bench(raw, orjson.loads, number)
+            print(f"{name:<10}{len(raw) / 1024:>10.1f}{t_std:>12.1f}{t_fast:>12.1f}{t_std / t_fast:>7.1f}x")
+        else:
+            print(f"{name:<10}{len(raw) / 1024:>10.1f}{t_std:>12.1f}{'-':>12}{'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+插件性能基准：在本地 aiohttp 桩接口与伪造的消息上下文上运行 Daily60sNewsPlugin，
+输出各场景的吞吐量与 p50/p99 延迟，便于发布前发现性能回退。
+
+需要在装有 AstrBot 的环境中运行（插件依赖 astrbot 包），在插件目录下执行:
+    python bench/plugin_bench.py
+    python bench/plugin_bench.py --scenario fanout --groups 10,1000,10000 --send-latency 20
+    python bench/plugin_bench.py --scenario burst --burst 500 --latency 300 --error-rate 0.1
+
+场景:
+    burst   N 个并发 /新闻 查询（冷缓存，测单飞合并与回复延迟；延迟只统计内容正确的回复，
+            错误提示单独计数）
+    fanout  向 10/1k/10k 个群组推送一次新闻（测限速、并发与推送台账开销；
+            延迟为各群组从推送开始到送达的耗时）
+    outage  接口全部报错时的并发查询（测熔断与旧内容兜底）
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from typing import Tuple
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+class StubApi:
+    """五个接口的本地桩：可配置延迟、错误率与响应大小"""
+
+    # 文本响应中的固定内容，用于校验查询回复
+    MARKER = "测试内容"
+
+    def __init__(self, latency: float, error_rate: float, payload_kb: int):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.payload_kb = payload_kb
+        self.requests = 0
+        self._image = b"\x89PNG\r\n\x1a\n" + os.urandom(max(1, payload_kb) * 1024)
+
+    async def _delay(self):
+        self.requests += 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        if random.random() < self.error_rate:
+            raise web.HTTPInternalServerError()
+
+    async def handle_api(self, request: web.Request) -> web.Response:
+        await self._delay()
+        fmt = request.query.get("format", "json")
+        name = request.match_info["name"]
+        if fmt == "image":
+            return web.Response(body=self._image, content_type="image/png")
+        items = [f"{name} 第{i}条：" + self.MARKER * 10 for i in range(max(1, self.payload_kb * 1024 // 100))]
+        if fmt == "text":
+            return web.Response(text="\n".join(items))
+        image_url = str(request.url.with_path(f"/img/{name}.png").with_query(None))
+        return web.json_response({"code": 200, "msg": "success", "data": {"news": items, "list": items, "image": image_url}})
+
+    async def handle_image(self, request: web.Request) -> web.Response:
+        await self._delay()
+        return web.Response(body=self._image, content_type="image/png")
+
+    async def start(self, port: int) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_get("/api/{name}", self.handle_api)
+        app.router.add_get("/img/{name}.png", self.handle_image)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        return runner
+
+
+class BenchConfig(dict):
+    """以属性方式读取的配置，代替 AstrBotConfig"""
+
+    def __getattr__(self, key):
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+
+class FakeContext:
+    """伪造的消息上下文：send_message 按设定延迟返回，并记录每次发送完成的时刻"""
+
+    def __init__(self, send_latency: float):
+        self.send_latency = send_latency
+        self.delivered_at: list = []
+
+    async def send_message(self, target, chain) -> bool:
+        if self.send_latency > 0:
+            await asyncio.sleep(self.send_latency)
+        self.delivered_at.append(time.perf_counter())
+        return True
+
+
+class FakeEvent:
+    """伪造的消息事件，记录回复内容"""
+
+    def __init__(self):
+        self.replies: list = []
+        self.message_str = "新闻"
+        self.is_at_or_wake_command = True
+        self.unified_msg_origin = "bench:FriendMessage:bench"
+
+    def get_sender_name(self) -> str:
+        return "bench"
+
+    def get_sender_id(self) -> str:
+        return "bench"
+
+    def get_group_id(self) -> str:
+        return ""
+
+    def plain_result(self, text):
+        return text
+
+    async def send(self, result):
+        self.replies.append(result)
+
+    def stop_event(self):
+        pass
+
+
+def reply_error(event: FakeEvent) -> str:
+    """
+    检查查询的回复：图片回复为 MessageChain，文本回复需包含桩接口的内容。
+    回复正常时返回空字符串，否则返回回复内容，避免把错误提示计为成功。
+    """
+    if len(event.replies) != 1:
+        return f"回复数为 {len(event.replies)}"
+    reply = event.replies[0]
+    if isinstance(reply, str):
+        return "" if StubApi.MARKER in reply else reply
+    return ""
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_queries(plugin, count: int) -> Tuple[list, list, float]:
+    """并发发起 count 个 /新闻 查询，返回 (成功回复的延迟列表, 错误回复列表, 总耗时)"""
+    latencies: list = []
+    errors: list = []
+
+    async def one():
+        event = FakeEvent()
+        started = time.perf_counter()
+        await plugin.cmd_news(event)
+        error = reply_error(event)
+        if error:
+            errors.append(error)
+        else:
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def error_note(errors: list) -> str:
+    return f"，错误回复 {len(errors)}（如: {errors[0][:40]}）" if errors else ""
+
+
+def report(name: str, latencies: list, elapsed: float, extra: str = ""):
+    throughput = len(latencies) / elapsed if elapsed > 0 else 0.0
+    print(
+        f"{name:<22}{len(latencies):>8}{throughput:>12.1f}"
+        f"{percentile(latencies, 0.5) * 1000:>10.1f}{percentile(latencies, 0.99) * 1000:>10.1f}  {extra}"
+    )
+
+
+def make_plugin(args, context: FakeContext, groups: int, **overrides):
+    base = f"http://127.0.0.1:{args.port}/api/"
+    config = BenchConfig(
+        groups=[f"bench:GroupMessage:{i}" for i in range(groups)],
+        push_time="08:00",
+        api_key="",
+        timeout=30,
+        news_api=base + "60s",
+        moyu_api=base + "moyu",
+        gold_api=base + "jinjia",
+        ai_api=base + "aizixun",
+        history_api=base + "history",
+        format=args.format,
+        prefetch_lead=0,
+        catchup_grace=0,
+        send_rate=args.send_rate,
+        send_concurrency=args.send_concurrency,
+        send_retries=0,
+        # 基准测的是拉取与回复，不测查询限流
+        command_user_limit=0,
+        command_group_limit=0,
+    )
+    config.update(overrides)
+    return main.Daily60sNewsPlugin(context, config)
+
+
+async def scenario_burst(args, stub: StubApi):
+    context = FakeContext(args.send_latency)
+    plugin = make_plugin(args, context, groups=1)
+    try:
+        for _ in range(args.rounds):
+            plugin._cache.clear()
+            plugin._last_good.clear()
+            plugin._validators.clear()
+            requests_before = stub.requests
+            latencies, errors, elapsed = await run_queries(plugin, args.burst)
+            report(f"burst x{args.burst}", latencies, elapsed, f"上游请求 {stub.requests - requests_before}{error_note(errors)}")
+    finally:
+        await plugin.terminate()
+
+
+async def scenario_fanout(args, stub: StubApi):
+    for groups in args.groups:
+        context = FakeContext(args.send_latency)
+        plugin = make_plugin(args, context, groups=groups)
+        try:
+            # 先预热内容，只测推送本身
+            await plugin._fetch_content("news", "text" if args.format == "text" else "image")
+            started = time.perf_counter()
+            await plugin._push_source("news", slot=f"bench-{uuid.uuid4().hex[:8]}")
+            elapsed = time.perf_counter() - started
+            # 每个目标从推送开始到送达的耗时，包含在限速器与并发信号量中的排队时间
+            latencies = [t - started for t in context.delivered_at]
+            report(f"fanout {groups}", latencies, elapsed, f"推送总耗时 {elapsed:.2f}s")
+        finally:
+            await plugin.terminate()
+
+
+async def scenario_outage(args, stub: StubApi):
+    context = FakeContext(args.send_latency)
+    plugin = make_plugin(args, context, groups=1, fetch_retries=3)
+    error_rate = stub.error_rate
+    try:
+        stub.error_rate = 0.0
+        await plugin._fetch_content("news", "text" if args.format == "text" else "image")
+        plugin._cache.clear()
+        stub.error_rate = 1.0
+        # 连续失败达到阈值后熔断器打开，之后的轮次不再请求上游
+        for i in range(3):
+            label = f"outage 第{i + 1}轮"
+            requests_before = stub.requests
+            latencies, errors, elapsed = await run_queries(plugin, args.burst)
+            # 查询先以旧内容回复，后台刷新结束后再统计上游请求数
+            await asyncio.gather(*plugin._inflight.values(), return_exceptions=True)
+            report(label, latencies, elapsed, f"上游请求 {stub.requests - requests_before}{error_note(errors)}")
+            plugin._cache.clear()
+    finally:
+        stub.error_rate = error_rate
+        await plugin.terminate()
+
+
+SCENARIOS = {"burst": scenario_burst, "fanout": scenario_fanout, "outage": scenario_outage}
+
+
+async def run(args):
+    stub = StubApi(args.latency / 1000, args.error_rate, args.payload_kb)
+    runner = await stub.start(args.port)
+    try:
+        print(f"{'场景':<20}{'样本数':>6}{'吞吐(次/秒)':>8}{'p50(ms)':>10}{'p99(ms)':>10}")
+        names = SCENARIOS if args.scenario == "all" else [args.scenario]
+        for name in names:
+            await SCENARIOS[name](args, stub)
+    finally:
+        await runner.cleanup()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Daily60sNewsPlugin 性能基准")
+    parser.add_argument("--scenario", choices=["all", *SCENARIOS], default="all")
+    parser.add_argument("--port", type=int, default=18790, help="桩接口监听端口")
+    parser.add_argument("--latency", type=float, default=100, help="桩接口响应延迟(毫秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="桩接口错误率(0-1)")
+    parser.add_argument("--payload-kb", type=int, default=8, help="响应大小(KB)")
+    parser.add_argument("--format", choices=["text", "image"], default="image")
+    parser.add_argument("--burst", type=int, default=200, help="并发查询数")
+    parser.add_argument("--rounds", type=int, default=3, help="burst 场景轮数")
+    parser.add_argument("--groups", type=lambda s: [int(x) for x in s.split(",")], default=[10, 1000, 10000])
+    parser.add_argument("--send-latency", type=float, default=10, help="send_message 模拟耗时(毫秒)")
+    parser.add_argument("--send-rate", type=float, default=1000, help="传给插件的 send_rate")
+    parser.add_argument("--send-concurrency", type=int, default=50, help="传给插件的 send_concurrency")
+    args = parser.parse_args()
+    args.send_latency /= 1000
+    return args
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
@@ -1,16 +1,1054 @@
 import asyncio
+import bisect
 import datetime
+import hashlib
+import heapq
+import json
 import os
+import random
+import sqlite3
+import sys
 import tempfile
+import threading
+import time
 import traceback
-from typing import Any, Tuple
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
 
 import aiohttp
+from aiohttp import web
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
 from astrbot.api import AstrBotConfig, logger
 from astrbot.api.event import AstrMessageEvent, filter
-from astrbot.api.star import Context, Star, register
+from astrbot.api.star import Context, Star, StarTools, register
 from astrbot.core.message.message_event_result import MessageChain
 
+# 共享连接池参数：总连接数、单主机连接数、DNS 缓存秒数、空闲连接保活秒数
+HTTP_POOL_LIMIT = 100
+HTTP_POOL_LIMIT_PER_HOST = 10
+HTTP_DNS_CACHE_TTL = 300
+HTTP_KEEPALIVE_TIMEOUT = 60
+# 推送失败重试的基础退避秒数，第 n 轮重试等待 base * 2^(n-1)
+SEND_RETRY_BASE_DELAY = 5
+# 接口重试退避的基础与最大秒数
+FETCH_RETRY_BASE_DELAY = 1
+FETCH_RETRY_MAX_DELAY = 10
+# 接口熔断：连续失败次数阈值与熔断冷却秒数
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 60
+# 推送使用旧内容时附带的提示
+STALE_NOTICE = "【接口响应较慢或不可用，以下为最近一次获取的内容】\n"
+# 条件请求校验信息最多保存的 URL 数
+VALIDATOR_MAX_ENTRIES = 64
+# 已处理图片（含处理失败）的内存记录最多保存的 (图片, 处理配置) 数
+PROCESSED_MAX_ENTRIES = 256
+# 流式下载图片的分块大小
+IMAGE_CHUNK_SIZE = 64 * 1024
+# 图片压缩时依次尝试的 JPEG 质量
+IMAGE_QUALITY_STEPS = (85, 75, 65, 55, 45)
+# 推送台账保留天数
+LEDGER_KEEP_DAYS = 7
+# 分片心跳间隔与判定下线的超时（秒），一致性哈希环上每个分片的虚拟节点数
+SHARD_HEARTBEAT_INTERVAL = 10
+SHARD_DEAD_AFTER = 30
+SHARD_VNODES = 64
+# 协调文件被其他实例锁住时的等待上限（秒）与认领重试次数；协调操作都在线程中执行
+SHARD_BUSY_TIMEOUT = 2
+SHARD_CLAIM_RETRIES = 3
+# 内置内容源名称，自定义内容不能与之重名
+BUILTIN_SOURCE_NAMES = ("news", "moyu", "gold", "ai", "history")
+# 耗时直方图的桶上界（秒）与图片大小直方图的桶上界（字节）
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024, 16 * 1024 * 1024)
+# 查询指令限流时最多记录的用户/群组数，超出后淘汰最久未使用的
+THROTTLE_MAX_KEYS = 4096
+# 事件循环监测的测量间隔（秒）、保留的卡顿调用栈样本数与每个样本保留的栈帧数
+WATCHDOG_INTERVAL = 0.1
+WATCHDOG_MAX_SAMPLES = 10
+WATCHDOG_STACK_DEPTH = 8
+# 本模块文件路径，用于判断卡顿时事件循环是否停在本插件代码中
+_MODULE_FILE = os.path.abspath(__file__)
+# 检查配置变更的间隔（秒）
+CONFIG_WATCH_INTERVAL = 5
+# 调度器单次最长睡眠秒数，醒来后重新对照墙钟时间
+SCHEDULER_MAX_SLEEP = 60
+
+
+def _json_loads(raw: bytes) -> Any:
+    """直接从原始字节解析 JSON：安装了 orjson 时使用它，否则使用标准库"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class TokenBucket:
+    """令牌桶限速器：按 rate 条/秒补充令牌，最多积攒 burst 个"""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = max(rate, 0.01)
+        self.burst = max(burst, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> bool:
+        """当前是否有可用令牌（不消耗）"""
+        self._refill()
+        return self._tokens >= 1
+
+    def try_acquire(self) -> bool:
+        """不等待地取一个令牌，没有可用令牌时返回 False"""
+        if self.available():
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class DeliveryLedger:
+    """
+    基于 SQLite 的推送台账，记录每个 (内容类型, 日期, 推送时间点, 目标) 的投递状态。
+    用于跳过已送达的目标，以及重启后补发错过的推送。
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS deliveries (
+                item TEXT NOT NULL,
+                date TEXT NOT NULL,
+                slot TEXT NOT NULL,
+                target TEXT NOT NULL,
+                status TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (item, date, slot, target)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def plan(self, item: str, date: str, slot: str, targets: list):
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO deliveries VALUES (?, ?, ?, ?, 'planned', ?)",
+            [(item, date, slot, t, now) for t in targets],
+        )
+        self._conn.commit()
+
+    def mark_many(self, item: str, date: str, slot: str, targets: list, status: str):
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO deliveries VALUES (?, ?, ?, ?, ?, ?)",
+            [(item, date, slot, t, status, now) for t in targets],
+        )
+        self._conn.commit()
+
+    def mark(self, item: str, date: str, slot: str, target: str, status: str):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO deliveries VALUES (?, ?, ?, ?, ?, ?)",
+            (item, date, slot, target, status, time.time()),
+        )
+        self._conn.commit()
+
+    def done_targets(self, item: str, date: str, slot: str) -> set:
+        rows = self._conn.execute(
+            "SELECT target FROM deliveries WHERE item=? AND date=? AND slot=? AND status='done'",
+            (item, date, slot),
+        )
+        return {r[0] for r in rows}
+
+    def purge(self, before_date: str):
+        self._conn.execute("DELETE FROM deliveries WHERE date < ?", (before_date,))
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+class ShardCoordinator:
+    """
+    多进程分片协调：各实例在共享的 SQLite 文件中登记心跳，
+    目标按一致性哈希分配给存活的分片；发送前在同一文件中认领 (内容, 日期, 时间点, 目标)，
+    保证分片重新分配期间同一目标只由一个实例发送。
+    文件可能被其他实例锁住，方法均为阻塞调用，插件通过 asyncio.to_thread 调用，内部用锁串行化。
+    """
+
+    def __init__(self, path: str, shard_id: int, shard_count: int):
+        self.shard_id = shard_id
+        self.shard_count = shard_count
+        self._ring: Tuple[list, list] = ([], [])
+        self._ring_shards: frozenset = frozenset()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=SHARD_BUSY_TIMEOUT, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS shards (shard_id INTEGER PRIMARY KEY, heartbeat REAL NOT NULL)"
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS claims (
+                item TEXT NOT NULL,
+                date TEXT NOT NULL,
+                slot TEXT NOT NULL,
+                target TEXT NOT NULL,
+                shard_id INTEGER NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (item, date, slot, target)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def heartbeat(self):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO shards VALUES (?, ?)", (self.shard_id, time.time()))
+            self._conn.commit()
+
+    def live_shards(self) -> frozenset:
+        """心跳未超时的分片，始终包含本实例"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT shard_id FROM shards WHERE heartbeat >= ? AND shard_id < ?",
+                (time.time() - SHARD_DEAD_AFTER, self.shard_count),
+            ).fetchall()
+        return frozenset(r[0] for r in rows) | {self.shard_id}
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    def _ring_for(self, shards: frozenset) -> Tuple[list, list]:
+        if shards != self._ring_shards:
+            points = sorted((self._hash(f"shard-{s}-{v}"), s) for s in shards for v in range(SHARD_VNODES))
+            self._ring = ([p for p, _ in points], [s for _, s in points])
+            self._ring_shards = shards
+        return self._ring
+
+    def owned(self, targets: list) -> list:
+        """返回按一致性哈希分配给本实例的目标；分片下线时只有它的目标会被重新分配"""
+        with self._lock:
+            keys, owners = self._ring_for(self.live_shards())
+        return [t for t in targets if owners[bisect.bisect(keys, self._hash(t)) % len(keys)] == self.shard_id]
+
+    def claim(self, item: str, date: str, slot: str, targets: list) -> list:
+        """
+        认领目标，返回本实例可以发送的目标：未被认领、已由本实例认领，
+        或认领者已下线且尚未送达的目标。
+        """
+        if not targets:
+            return []
+        with self._lock:
+            live = sorted(self.live_shards())
+            marks = ",".join("?" * len(live))
+            with self._conn:
+                self._conn.executemany(
+                    f"""
+                    INSERT INTO claims VALUES (?, ?, ?, ?, ?, 0)
+                    ON CONFLICT (item, date, slot, target) DO UPDATE SET shard_id = excluded.shard_id
+                    WHERE claims.done = 0 AND claims.shard_id NOT IN ({marks})
+                    """,
+                    [(item, date, slot, t, self.shard_id, *live) for t in targets],
+                )
+            rows = self._conn.execute(
+                "SELECT target FROM claims WHERE item=? AND date=? AND slot=? AND shard_id=? AND done=0",
+                (item, date, slot, self.shard_id),
+            ).fetchall()
+        mine = {r[0] for r in rows}
+        return [t for t in targets if t in mine]
+
+    def complete(self, item: str, date: str, slot: str, targets: list):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE claims SET done=1 WHERE item=? AND date=? AND slot=? AND target=?",
+                [(item, date, slot, t) for t in targets],
+            )
+
+    def purge(self, before_date: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM claims WHERE date < ?", (before_date,))
+            self._conn.commit()
+
+    def leave(self):
+        """注销心跳，其余分片立即接管本实例的目标"""
+        with self._lock:
+            self._conn.execute("DELETE FROM shards WHERE shard_id=?", (self.shard_id,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CircuitBreaker:
+    """
+    接口熔断器：连续失败达到 threshold 次后熔断 reset_timeout 秒，期间直接拒绝请求；
+    冷却结束后放行一次试探请求，成功则恢复，失败则重新熔断。
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 60):
+        self.threshold = max(1, threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = "closed"
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.state = "closed"
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.threshold:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+
+def _backoff_delay(attempt: int, base: float = FETCH_RETRY_BASE_DELAY, cap: float = FETCH_RETRY_MAX_DELAY) -> float:
+    """指数退避加全抖动：第 attempt 次重试前等待 [0, min(cap, base * 2^attempt)] 秒"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class ImageStore:
+    """
+    按内容哈希存放图片的本地缓存目录，同一张图片只写入一次，
+    按最近使用时间(mtime)淘汰，总大小不超过 max_bytes。
+    """
+
+    PART_SUFFIX = ".part"
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        # enforce_cap 在线程中执行，同一时间只进行一次扫描
+        self._cap_lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def _sniff(head: bytes) -> Optional[str]:
+        """根据文件头判断图片类型，返回扩展名；不是图片时返回 None"""
+        if head.startswith(b"\xff\xd8\xff"):
+            return ".jpeg"
+        if head.startswith(b"\x89PNG"):
+            return ".png"
+        if head.startswith(b"GIF8"):
+            return ".gif"
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return ".webp"
+        if head.startswith(b"BM"):
+            return ".bmp"
+        return None
+
+    async def put_stream(self, resp: aiohttp.ClientResponse, max_bytes: int) -> str:
+        """
+        边下载边写入缓存文件并计算哈希，不在内存中缓冲整张图片。
+        Content-Type 不是图片、文件头不是图片或大小超过 max_bytes 时中止并抛出异常。
+        """
+        content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type and not (content_type.startswith("image/") or content_type == "application/octet-stream"):
+            raise Exception(f"图片接口返回了非图片内容: {content_type}")
+        if resp.content_length is not None and resp.content_length > max_bytes:
+            raise Exception(f"图片过大: {resp.content_length} 字节")
+        hasher = hashlib.sha256()
+        head = b""
+        size = 0
+        part = os.path.join(self.root, uuid.uuid4().hex + self.PART_SUFFIX)
+        try:
+            with open(part, "wb") as f:
+                async for chunk in resp.content.iter_chunked(IMAGE_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise Exception(f"图片超过大小上限 {max_bytes} 字节")
+                    if len(head) < 16:
+                        head += chunk[: 16 - len(head)]
+                    hasher.update(chunk)
+                    f.write(chunk)
+            suffix = self._sniff(head)
+            if suffix is None:
+                raise Exception("下载内容不是有效的图片")
+            path = os.path.join(self.root, hasher.hexdigest() + suffix)
+            if os.path.exists(path):
+                self.touch(path)
+            else:
+                os.replace(part, path)
+                await asyncio.to_thread(self.enforce_cap, path)
+            return path
+        finally:
+            if os.path.exists(part):
+                os.remove(part)
+
+    def touch(self, path: str):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def enforce_cap(self, keep: str = ""):
+        """按 mtime 淘汰旧图片直到总大小不超过上限；需扫描整个目录，应在线程中调用"""
+        with self._cap_lock:
+            files = []
+            total = 0
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if not entry.is_file() or entry.name.endswith(self.PART_SUFFIX):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+            files.sort()
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def cleanup(self):
+        """启动时清理中断写入留下的临时文件，并按容量上限淘汰旧图片"""
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(self.PART_SUFFIX):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+        self.enforce_cap()
+
+
+@dataclass(frozen=True)
+class ImageProfile:
+    """平台类别的图片处理参数：宽度上限(像素)与大小上限(KB)，0 表示不限制"""
+
+    max_width: int = 0
+    max_kb: int = 0
+
+    @property
+    def key(self) -> str:
+        return f"w{self.max_width}k{self.max_kb}"
+
+
+def _parse_image_profile(line: str) -> Tuple[str, ImageProfile]:
+    """解析一条图片处理配置：平台前缀=宽度上限,大小上限KB，前缀填 * 表示其余所有平台"""
+    prefix, sep, rest = str(line).partition("=")
+    parts = [p.strip() for p in rest.replace("，", ",").split(",")]
+    if not sep or not prefix.strip() or not parts[0]:
+        raise ValueError("格式应为 平台前缀=宽度上限,大小上限KB")
+    max_width = int(parts[0])
+    max_kb = int(parts[1]) if len(parts) > 1 and parts[1] else 0
+    if max_width < 0 or max_kb < 0:
+        raise ValueError("上限不能为负数")
+    return prefix.strip(), ImageProfile(max_width, max_kb)
+
+
+def _process_image(src: str, dst: str, max_width: int, max_kb: int) -> str:
+    """
+    在子进程中执行：按宽度上限等比缩放并压缩为 JPEG，逐步降低质量直到不超过 max_kb。
+    原图已满足限制或为动图时直接返回原图路径。
+    """
+    with Image.open(src) as im:
+        too_wide = bool(max_width) and im.width > max_width
+        too_big = bool(max_kb) and os.path.getsize(src) > max_kb * 1024
+        if getattr(im, "is_animated", False) or not (too_wide or too_big):
+            return src
+        im.load()
+        if im.mode in ("RGBA", "LA", "P"):
+            im = im.convert("RGBA")
+            background = Image.new("RGB", im.size, (255, 255, 255))
+            background.paste(im, mask=im.getchannel("A"))
+            im = background
+        elif im.mode != "RGB":
+            im = im.convert("RGB")
+        if too_wide:
+            im = im.resize((max_width, max(1, round(im.height * max_width / im.width))), Image.LANCZOS)
+        part = f"{dst}.{os.getpid()}{ImageStore.PART_SUFFIX}"
+        try:
+            for quality in IMAGE_QUALITY_STEPS:
+                im.save(part, "JPEG", quality=quality, optimize=True, progressive=True)
+                if not max_kb or os.path.getsize(part) <= max_kb * 1024:
+                    break
+            os.replace(part, dst)
+        finally:
+            if os.path.exists(part):
+                os.remove(part)
+    return dst
+
+
+class ContentCache:
+    """
+    按 (内容类型, 格式, 日期) 缓存拉取结果，支持 TTL 过期与 LRU 淘汰。
+    图片格式缓存的是 ImageStore 中的文件路径，文件已被淘汰时视为未命中。
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[tuple, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, value = entry
+        expired = time.monotonic() - stored_at >= self.ttl
+        if expired or (key[1] == "image" and not os.path.exists(value)):
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: tuple, value: str):
+        self._entries.pop(key, None)
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic(), value)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def drop(self, item: str):
+        """移除某个内容类型的全部缓存"""
+        for key in [k for k in self._entries if k[0] == item]:
+            del self._entries[key]
+
+
+class Metrics:
+    """
+    进程内指标：计数器与直方图，按 Prometheus 文本格式输出，并可按标签汇总。
+    标签只使用内容类型、平台前缀等有限取值，避免群组数量导致序列膨胀。
+    """
+
+    def __init__(self, prefix: str = "nyscheduler"):
+        self.prefix = prefix
+        self._meta: dict = {}
+        self._counters: dict = {}
+        self._hists: dict = {}
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Tuple[float, ...] = ()):
+        self._meta[name] = (kind, help_text, tuple(buckets))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        hist = self._hists.get(key)
+        if hist is None:
+            buckets = self._meta[name][2]
+            # [各桶计数..., 总和, 次数]
+            hist = self._hists[key] = [0] * len(buckets) + [0.0, 0]
+        for i, bound in enumerate(self._meta[name][2]):
+            if value <= bound:
+                hist[i] += 1
+        hist[-2] += value
+        hist[-1] += 1
+
+    def counter_totals(self, name: str, by: str, **match) -> dict:
+        """按单个标签汇总计数器：{标签值: 总和}，match 指定需要匹配的其余标签"""
+        totals: dict = {}
+        for (n, labels), value in self._counters.items():
+            labels = dict(labels)
+            if n == name and all(labels.get(lk) == lv for lk, lv in match.items()):
+                k = labels.get(by, "")
+                totals[k] = totals.get(k, 0) + value
+        return totals
+
+    def hist_summary(self, name: str, by: str) -> dict:
+        """按单个标签汇总直方图：{标签值: (次数, 平均值, 近似p95)}，p95 取所在桶的上界"""
+        buckets = self._meta[name][2]
+        merged: dict = {}
+        for (n, labels), hist in self._hists.items():
+            if n != name:
+                continue
+            k = dict(labels).get(by, "")
+            acc = merged.setdefault(k, [0] * len(hist))
+            for i, v in enumerate(hist):
+                acc[i] += v
+        result = {}
+        for k, acc in merged.items():
+            count = acc[-1]
+            p95 = float("inf")
+            for i, bound in enumerate(buckets):
+                if acc[i] >= 0.95 * count:
+                    p95 = bound
+                    break
+            result[k] = (count, acc[-2] / count if count else 0.0, p95)
+        return result
+
+    def render(self) -> str:
+        """输出 Prometheus 文本格式"""
+        lines = []
+        for name, (kind, help_text, buckets) in self._meta.items():
+            full = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            if kind == "histogram":
+                for (n, labels), hist in sorted(self._hists.items()):
+                    if n != name:
+                        continue
+                    for i, bound in enumerate(buckets):
+                        lines.append(f"{full}_bucket{self._labels(labels, le=bound)} {hist[i]}")
+                    lines.append(f"{full}_bucket{self._labels(labels, le='+Inf')} {hist[-1]}")
+                    lines.append(f"{full}_sum{self._labels(labels)} {hist[-2]:.6f}")
+                    lines.append(f"{full}_count{self._labels(labels)} {hist[-1]}")
+            else:
+                for (n, labels), value in sorted(self._counters.items()):
+                    if n == name:
+                        lines.append(f"{full}{self._labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(labels: tuple, **extra) -> str:
+        pairs = list(labels) + list(extra.items())
+        if not pairs:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class LoopWatchdog:
+    """
+    事件循环延迟监测：协程按固定间隔睡眠并测量实际唤醒的延迟；
+    采样线程在事件循环超过阈值未响应时抓取循环线程的调用栈，
+    并区分卡在本插件代码中还是其他插件/适配器的代码中。
+    """
+
+    def __init__(self, threshold: float, metrics: Metrics, interval: float = WATCHDOG_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self._metrics = metrics
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id = 0
+        self._last_tick = time.monotonic()
+        self._sampled = False
+        self.samples: deque = deque(maxlen=WATCHDOG_MAX_SAMPLES)
+        self.started_at = time.time()
+        self.ticks = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.last_lag = 0.0
+        self.stalls = {"plugin": 0, "other": 0}
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._thread = threading.Thread(target=self._sample_loop, name="nyscheduler-watchdog", daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                started = time.monotonic()
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                lag = max(0.0, now - started - self.interval)
+                self._last_tick = now
+                self._sampled = False
+                self.ticks += 1
+                self.last_lag = lag
+                self.lag_total += lag
+                self.lag_max = max(self.lag_max, lag)
+                self._metrics.observe("loop_lag_seconds", lag)
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stop.set()
+
+    def _sample_loop(self):
+        """
+        在独立线程中运行：事件循环停顿超过阈值时抓取一次调用栈。
+        统计与样本交回事件循环线程记录，避免与读取指标、样本的代码并发修改。
+        """
+        while not self._stop.wait(max(0.01, self.threshold / 2)):
+            stalled = time.monotonic() - self._last_tick - self.interval
+            if stalled < self.threshold or self._sampled:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._sampled = True
+            stack = traceback.extract_stack(frame)
+            in_plugin = any(os.path.abspath(f.filename) == _MODULE_FILE for f in stack)
+            location = "plugin" if in_plugin else "other"
+            lines = [f"  {os.path.basename(f.filename)}:{f.lineno} {f.name}: {f.line or ''}" for f in stack[-WATCHDOG_STACK_DEPTH:]]
+            try:
+                self._loop.call_soon_threadsafe(self._record_stall, (time.time(), stalled, location, lines))
+            except RuntimeError:
+                # 事件循环已关闭
+                return
+
+    def _record_stall(self, sample: tuple):
+        location = sample[2]
+        self.stalls[location] += 1
+        self._metrics.inc("loop_stalls_total", location=location)
+        self.samples.append(sample)
+
+    def avg_lag(self) -> float:
+        return self.lag_total / self.ticks if self.ticks else 0.0
+
+
+def _new_metrics() -> Metrics:
+    m = Metrics()
+    m.describe("fetch_attempts_total", "counter", "上游接口请求次数，按内容、第几次尝试与结果区分")
+    m.describe("fetch_seconds", "histogram", "上游接口单次请求耗时（秒）", LATENCY_BUCKETS)
+    m.describe("cache_requests_total", "counter", "内容缓存查询次数，按内容与命中结果区分")
+    m.describe("image_downloads_total", "counter", "图片下载次数，按结果区分（downloaded/not_modified/error）")
+    m.describe("image_download_seconds", "histogram", "图片下载耗时（秒）", LATENCY_BUCKETS)
+    m.describe("image_download_bytes", "histogram", "下载的图片大小（字节）", SIZE_BUCKETS)
+    m.describe("send_total", "counter", "send_message 调用次数，按平台与结果区分")
+    m.describe("send_seconds", "histogram", "单个目标 send_message 耗时（秒）", LATENCY_BUCKETS)
+    m.describe("commands_total", "counter", "查询指令次数，按内容与结果区分（served/cached/dropped）")
+    m.describe("loop_lag_seconds", "histogram", "事件循环调度延迟（秒），开启 loop_watchdog 后记录", LATENCY_BUCKETS)
+    m.describe("loop_stalls_total", "counter", "事件循环停顿超过阈值的次数，按停顿时所在代码区分（plugin/other）")
+    m.describe("push_runs_total", "counter", "推送执行次数，按内容与结果区分")
+    m.describe("push_run_seconds", "histogram", "一次推送从拉取内容到全部目标发送结束的耗时（秒）", LATENCY_BUCKETS)
+    return m
+
+
+class JsonPath:
+    """
+    预编译的 JSON 提取路径，如 data.image、data.news[*]、data.list[0].title。
+    键名用点分隔，[n] 取列表下标，[*] 或 * 展开列表或字典的全部元素。
+    求值为迭代方式，按文档顺序产出匹配值，调用方取到所需结果即可停止。
+    """
+
+    WILDCARD = object()
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        self.steps: Tuple[Any, ...] = self._compile(expr)
+
+    @classmethod
+    def _compile(cls, expr: str) -> Tuple[Any, ...]:
+        steps = []
+        for part in expr.strip().split("."):
+            if not part:
+                raise ValueError(f"提取路径格式错误: {expr}")
+            key, _, rest = part.partition("[")
+            if key:
+                steps.append(cls.WILDCARD if key == "*" else key)
+            while rest:
+                index, sep, rest = rest.partition("]")
+                if not sep or (rest and not rest.startswith("[")):
+                    raise ValueError(f"提取路径格式错误: {expr}")
+                rest = rest[1:]
+                index = index.strip()
+                if index == "*":
+                    steps.append(cls.WILDCARD)
+                else:
+                    try:
+                        steps.append(int(index))
+                    except ValueError:
+                        raise ValueError(f"提取路径下标错误: {expr}") from None
+        return tuple(steps)
+
+    def iter_values(self, data: Any):
+        """按文档顺序产出路径匹配到的值"""
+        stack = [(data, 0)]
+        steps = self.steps
+        while stack:
+            value, i = stack.pop()
+            if i == len(steps):
+                yield value
+                continue
+            step = steps[i]
+            if step is JsonPath.WILDCARD:
+                if isinstance(value, dict):
+                    children = list(value.values())
+                elif isinstance(value, list):
+                    children = value
+                else:
+                    continue
+                stack.extend((child, i + 1) for child in reversed(children))
+            elif isinstance(step, int):
+                if isinstance(value, list) and -len(value) <= step < len(value):
+                    stack.append((value[step], i + 1))
+            elif isinstance(value, dict) and step in value:
+                stack.append((value[step], i + 1))
+
+    def __repr__(self) -> str:
+        return f"JsonPath({self.expr!r})"
+
+
+def _compile_paths(exprs) -> Tuple[JsonPath, ...]:
+    if isinstance(exprs, str):
+        exprs = exprs.replace("，", ",").split(",")
+    return tuple(JsonPath(e) for e in exprs if e and e.strip())
+
+
+def _is_image_url(v: Any) -> bool:
+    return isinstance(v, str) and v.startswith("http") and (".jpg" in v or ".jpeg" in v or ".png" in v)
+
+
+# 兜底遍历时跳过的状态类字段，避免把 "success" 之类的状态值当作正文
+WALK_SKIP_KEYS = frozenset(("code", "msg", "message", "status", "success", "error", "time", "timestamp", "request_id"))
+# 提取文本时额外跳过的元数据字段（日期、链接等），它们不是正文
+TEXT_SKIP_KEYS = WALK_SKIP_KEYS | frozenset(("date", "day", "updated", "update_time", "id", "url", "link", "image", "cover", "img"))
+# 兜底遍历最多访问的节点数
+WALK_MAX_NODES = 2000
+
+
+def _walk_values(data: Any, skip_keys: frozenset = WALK_SKIP_KEYS):
+    """有界的深度优先遍历，按文档顺序产出字符串，跳过 skip_keys 中的字段"""
+    stack = [data]
+    visited = 0
+    while stack and visited < WALK_MAX_NODES:
+        v = stack.pop()
+        visited += 1
+        if isinstance(v, dict):
+            stack.extend(vv for k, vv in reversed(list(v.items())) if k not in skip_keys)
+        elif isinstance(v, list):
+            stack.extend(reversed(v))
+        elif isinstance(v, str):
+            yield v
+
+
+def _is_text(v: Any) -> bool:
+    return isinstance(v, (str, int, float)) and not isinstance(v, bool) and v != "" and not str(v).startswith("http")
+
+
+def _dict_line(item: dict) -> str:
+    """把列表中的一个对象拼成一行：依次取非元数据、非链接的标量字段"""
+    return " ".join(str(v) for k, v in item.items() if k not in TEXT_SKIP_KEYS and _is_text(v))
+
+
+def _walk_first_text(data: Any, date: str = "") -> Optional[str]:
+    """兜底：返回 JSON 中第一个正文字符串，跳过状态、日期与链接字段"""
+    return next((v for v in _walk_values(data, TEXT_SKIP_KEYS) if _is_text(v)), None) or str(data)
+
+
+def _walk_first_image_url(data: Any) -> Optional[str]:
+    """兜底：返回 JSON 中第一个图片链接"""
+    return next((v for v in _walk_values(data) if _is_image_url(v)), None)
+
+
+def _payload(data: Any) -> dict:
+    payload = data.get("data") if isinstance(data, dict) else None
+    return payload if isinstance(payload, dict) else {}
+
+
+def _news_text(data: Any, date: str = "") -> Optional[str]:
+    payload = _payload(data)
+    date_str = payload.get("date") or date
+    tip = payload.get("tip") or ""
+    news_list = payload.get("news") or []
+    lines = [f"{date_str} 每日60秒新闻", *(f"• {item}" for item in news_list)]
+    if tip:
+        lines.append(f"提示：{tip}")
+    return "\n".join(lines)
+
+
+def _list_text(title: str, fields: Tuple[str, ...]) -> Callable[[Any, str], Optional[str]]:
+    """
+    为 data.list 为对象列表的接口生成文本组装函数：标题行加每个对象一行，每行依次取 fields 中的字段。
+    没有取到任何条目时返回 None，交由提取路径处理。
+    """
+
+    def extract(data: Any, date: str = "") -> Optional[str]:
+        payload = _payload(data)
+        items = payload.get("list")
+        if not isinstance(items, list):
+            return None
+        lines = []
+        for item in items:
+            if isinstance(item, dict):
+                line = " ".join(str(item[f]) for f in fields if _is_text(item.get(f)))
+            else:
+                line = str(item) if _is_text(item) else ""
+            if line:
+                lines.append(f"• {line}")
+        if not lines:
+            return None
+        return "\n".join([f"{payload.get('date') or date} {title}", *lines])
+
+    return extract
+
+
+_gold_text = _list_text("今日金价", ("name", "price", "unit", "change"))
+_ai_text = _list_text("AI资讯", ("title", "summary"))
+_history_text = _list_text("历史上的今天", ("year", "title"))
+
+
+# 未单独配置时使用的提取路径，依次尝试，命中即停止
+DEFAULT_TEXT_PATHS = ("data.text", "data.content", "data.list[*]", "text", "content")
+DEFAULT_IMAGE_PATHS = ("data.image", "data.cover", "data.url", "data.img", "image", "url")
+
+
+@dataclass
+class ContentSource:
+    """
+    内容源定义。内置的五类内容与配置中追加的自定义内容都用它描述，
+    共用同一套拉取、缓存与推送流程。
+    """
+
+    name: str
+    label: str
+    api: str
+    format: str = "image"
+    push_time: str = ""
+    enabled: bool = True
+    # 文本与图片链接的提取路径，未命中时退回有界遍历
+    text_paths: Tuple[str, ...] = DEFAULT_TEXT_PATHS
+    image_paths: Tuple[str, ...] = DEFAULT_IMAGE_PATHS
+    # 自定义文本组装函数，设置后优先于 text_paths，返回 None 时再按 text_paths 提取
+    text_extractor: Optional[Callable[[Any, str], Optional[str]]] = None
+    # 不自动推送的星期（datetime.weekday()，周一为 0）
+    skip_weekdays: Tuple[int, ...] = ()
+    commands: Tuple[str, ...] = ()
+    # 请求时是否附带 date 参数
+    date_param: bool = False
+
+    def __post_init__(self):
+        self._text_paths = _compile_paths(self.text_paths)
+        self._image_paths = _compile_paths(self.image_paths)
+
+    @property
+    def kind(self) -> str:
+        """推送与查询使用的内容形式：text 或 image"""
+        return "text" if self.format == "text" else "image"
+
+    def request_url(self, fmt: str, api_key: str, date: str) -> str:
+        params = []
+        if self.date_param:
+            params.append(f"date={date}")
+        params.append(f"format={fmt}")
+        if api_key:
+            params.append(f"apikey={api_key}")
+        sep = "&" if "?" in self.api else "?"
+        return f"{self.api}{sep}{'&'.join(params)}"
+
+    def extract_text(self, data: Any, date: str) -> Optional[str]:
+        if self.text_extractor is not None:
+            text = self.text_extractor(data, date)
+            if text:
+                return text
+        for path in self._text_paths:
+            # 路径命中对象时（如 data.list[*] 的每一项）把对象的正文字段拼成一行
+            values = [_dict_line(v) if isinstance(v, dict) else str(v) for v in path.iter_values(data) if isinstance(v, dict) or _is_text(v)]
+            values = [v for v in values if v]
+            if values:
+                return "\n".join(values)
+        return _walk_first_text(data, date)
+
+    def extract_image_url(self, data: Any) -> Optional[str]:
+        for path in self._image_paths:
+            url = next((v for v in path.iter_values(data) if _is_image_url(v)), None)
+            if url:
+                return url
+        return _walk_first_image_url(data)
+
+
+@dataclass
+class Subscription:
+    """单个目标的订阅：订阅的内容、格式与推送时间，留空的项沿用内容源配置"""
+
+    target: str
+    items: Tuple[str, ...] = ()
+    format: str = ""
+    push_time: str = ""
+
+
+def _parse_subscription(line: str) -> Subscription:
+    """
+    解析一条订阅配置：目标|内容|格式|推送时间。
+    内容用逗号分隔，填内容名称或指令均可，留空表示全部内容；格式与推送时间留空则沿用内容源配置。
+    """
+    parts = [p.strip() for p in str(line).split("|")]
+    if not parts[0]:
+        raise ValueError("需要填写目标群组")
+    parts += [""] * (4 - len(parts))
+    target, items, fmt, push_time = parts[:4]
+    if fmt and fmt not in ("text", "image"):
+        raise ValueError("格式需为 text 或 image")
+    return Subscription(
+        target=target,
+        items=tuple(i.strip() for i in items.replace("，", ",").split(",") if i.strip()),
+        format=fmt,
+        push_time=push_time,
+    )
+
+
+def _parse_custom_source(line: str) -> ContentSource:
+    """
+    解析一条自定义内容源配置：名称|接口地址|格式|推送时间|查询指令|不推送的星期|提取路径。
+    后五项可省略；查询指令与提取路径用逗号分隔，星期用 1-7 表示周一至周日。
+    """
+    parts = [p.strip() for p in str(line).split("|")]
+    if len(parts) < 2 or not parts[0] or not parts[1]:
+        raise ValueError("至少需要填写 名称|接口地址")
+    parts += [""] * (7 - len(parts))
+    name, api, fmt, push_time, commands, weekdays, paths = parts[:7]
+    skip = tuple(int(w) - 1 for w in weekdays.replace("，", ",").split(",") if w.strip())
+    if any(w < 0 or w > 6 for w in skip):
+        raise ValueError("星期需填写 1-7")
+    extra = {}
+    if paths:
+        compiled = _compile_paths(paths)
+        extra["text_paths"] = extra["image_paths"] = tuple(p.expr for p in compiled)
+    return ContentSource(
+        name=name,
+        label=name,
+        api=api,
+        format="text" if fmt == "text" else "image",
+        push_time=push_time,
+        skip_weekdays=skip,
+        commands=tuple(c.strip() for c in commands.replace("，", ",").split(",") if c.strip()),
+        **extra,
+    )
+
 
 @register(
     "astrbot_nyscheduler",
@@ -28,36 +1066,384 @@ class Daily60sNewsPlugin(Star):
         self.config = config
         self.groups = self.config.groups
         self.push_time = self.config.push_time
-        self.news_api = getattr(self.config, "news_api", "https://api.nycnm.cn/api/v2/60s")
-        self.format = getattr(self.config, "format", "image")
-        self.moyu_format = getattr(self.config, "moyu_format", "image")
-        self.moyu_api = getattr(self.config, "moyu_api", "https://api.nycnm.cn/api/v2/moyu")
-        self.enable_news = getattr(self.config, "enable_news", True)
-        self.enable_moyu = getattr(self.config, "enable_moyu", True)
-        self.enable_gold = getattr(self.config, "enable_gold", True)
-        self.enable_ai = getattr(self.config, "enable_ai", True)
-        self.enable_history = getattr(self.config, "enable_history", True)
-        self.gold_format = getattr(self.config, "gold_format", "image")
-        self.gold_api = getattr(self.config, "gold_api", "https://api.nycnm.cn/api/v2/jinjia")
-        self.ai_format = getattr(self.config, "ai_format", "image")
-        self.ai_api = getattr(self.config, "ai_api", "https://api.nycnm.cn/api/v2/aizixun")
-        self.history_format = getattr(self.config, "history_format", "image")
-        self.history_api = getattr(self.config, "history_api", "https://api.nycnm.cn/api/v2/history")
         self.api_key = getattr(self.config, "api_key", "")
         self.timeout = getattr(self.config, "timeout", 30)
-        self.news_push_time = getattr(self.config, "news_push_time", "")
-        self.moyu_push_time = getattr(self.config, "moyu_push_time", "")
-        self.gold_push_time = getattr(self.config, "gold_push_time", "")
-        self.ai_push_time = getattr(self.config, "ai_push_time", "")
-        self.history_push_time = getattr(self.config, "history_push_time", "")
+        self.sources = self._build_sources()
+        self._plan = self._build_plan()
         logger.info(f"插件配置: {self.config}")
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+        self._cache = ContentCache(
+            ttl=getattr(self.config, "cache_ttl", 1800),
+            max_entries=getattr(self.config, "cache_max_entries", 32),
+        )
+        self._inflight: dict = {}
+        self._breakers: dict = {}
+        self._last_good: dict = {}
+        # 条件请求校验信息：url -> (ETag, Last-Modified, 本地响应体或图片路径)
+        self._validators: "OrderedDict[str, tuple]" = OrderedDict()
+        self._send_semaphore = asyncio.Semaphore(max(1, int(getattr(self.config, "send_concurrency", 5))))
+        self._rate_limiters: dict = {}
+        # 查询指令限流：按用户与按群组的令牌桶，以及用户触发的拉取并发上限
+        self._command_buckets: "OrderedDict[tuple, TokenBucket]" = OrderedDict()
+        self._command_semaphore = asyncio.Semaphore(max(1, int(getattr(self.config, "command_concurrency", 5))))
+        try:
+            self._data_dir = str(StarTools.get_data_dir("astrbot_plugin_nyscheduler"))
+        except Exception as e:
+            self._data_dir = os.path.join(tempfile.gettempdir(), "astrbot_plugin_nyscheduler")
+            os.makedirs(self._data_dir, exist_ok=True)
+            logger.warning(f"获取插件数据目录失败，改用 {self._data_dir}: {e}")
+        self._images = ImageStore(
+            os.path.join(self._data_dir, "image_cache"),
+            max_bytes=int(getattr(self.config, "image_cache_max_mb", 100)) * 1024 * 1024,
+        )
+        self._image_profiles = self._build_image_profiles()
+        self._image_pool: Optional[ProcessPoolExecutor] = None
+        self._processing: dict = {}
+        # (原图路径, 配置) -> 处理结果路径，原图已满足限制时结果即原图
+        self._processed: "OrderedDict[tuple, str]" = OrderedDict()
+        self._ledger: Optional[DeliveryLedger] = None
+        try:
+            self._ledger = DeliveryLedger(os.path.join(self._data_dir, "deliveries.db"))
+            keep_from = datetime.date.today() - datetime.timedelta(days=LEDGER_KEEP_DAYS)
+            self._ledger.purge(keep_from.strftime("%Y-%m-%d"))
+        except Exception as e:
+            logger.error(f"[推送台账] 初始化失败，将不记录投递状态: {e}")
+        self._shards = self._init_shards()
+        self._push_tasks: set = set()
+        self._job_seq = 0
+        # 配置热更新：需要重建调度的内容类型，以及唤醒调度器的事件
+        self._dirty_items: set = set()
+        self._schedule_changed = asyncio.Event()
+        self._config_snapshot = self._snapshot_config()
+        self._config_mtime = self._config_file_mtime()
+        self._metrics = _new_metrics()
+        self._metrics_runner: Optional[web.AppRunner] = None
         self._tasks = [
-            asyncio.create_task(self._item_task("news")),
-            asyncio.create_task(self._item_task("moyu")),
-            asyncio.create_task(self._item_task("gold")),
-            asyncio.create_task(self._item_task("ai")),
-            asyncio.create_task(self._item_task("history")),
+            asyncio.create_task(self._scheduler_loop()),
+            asyncio.create_task(asyncio.to_thread(self._images.cleanup)),
+            asyncio.create_task(self._catch_up_missed()),
+            asyncio.create_task(self._start_metrics_server()),
+            asyncio.create_task(self._config_watch_loop()),
+        ]
+        if self._shards is not None:
+            self._tasks.append(asyncio.create_task(self._shard_heartbeat_loop()))
+        self._watchdog: Optional[LoopWatchdog] = None
+        self._watchdog_task: Optional[asyncio.Task] = None
+        self._start_watchdog()
+
+    def _snapshot_config(self) -> dict:
+        return json.loads(json.dumps(dict(self.config), ensure_ascii=False, default=str))
+
+    def _config_file_mtime(self) -> float:
+        path = getattr(self.config, "config_path", "") or ""
+        try:
+            return os.path.getmtime(path) if path else 0.0
+        except OSError:
+            return 0.0
+
+    def _load_config_file(self, force: bool = False):
+        """配置文件被修改时把新内容读入 self.config（只更新内存，不写回文件）"""
+        path = getattr(self.config, "config_path", "") or ""
+        mtime = self._config_file_mtime()
+        if not path or (not force and mtime == self._config_mtime):
+            return
+        try:
+            with open(path, "r", encoding="utf-8-sig") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            # 文件可能正在写入，下次检查时再读
+            logger.warning(f"[配置] 读取配置文件失败: {e}")
+            return
+        self._config_mtime = mtime
+        if isinstance(data, dict):
+            self.config.update(data)
+
+    async def _config_watch_loop(self):
+        """
+        定期检查配置文件与内存中的配置，有变化时热更新。
+        网页端保存配置时 AstrBot 会重新加载整个插件，这里只覆盖直接编辑配置文件的情况。
+        """
+        while True:
+            await asyncio.sleep(CONFIG_WATCH_INTERVAL)
+            try:
+                self._load_config_file()
+                self._apply_config()
+            except Exception as e:
+                logger.error(f"[配置] 热更新失败: {e}")
+                traceback.print_exc()
+
+    def _apply_config(self) -> list:
+        """
+        对比上次生效的配置，只重建变化的部分：内容源、订阅矩阵与对应的调度条目、限速器、并发数、缓存与图片处理参数。
+        连接池、已缓存的内容与进行中的推送保持不变。返回变更说明列表。
+        """
+        snapshot = self._snapshot_config()
+        old = self._config_snapshot
+        changed = {k for k in set(old) | set(snapshot) if old.get(k) != snapshot.get(k)}
+        if not changed:
+            return []
+        self._config_snapshot = snapshot
+        changes = []
+        self.groups = self.config.groups
+        self.push_time = self.config.push_time
+        self.api_key = getattr(self.config, "api_key", "")
+        self.timeout = getattr(self.config, "timeout", 30)
+
+        old_sources, old_plan = self.sources, self._plan
+        self.sources = self._build_sources()
+        self._plan = self._build_plan()
+        dirty = set()
+        for item in set(old_sources) | set(self.sources):
+            before, after = old_sources.get(item), self.sources.get(item)
+            if before != after:
+                dirty.add(item)
+                if before is None or after is None or before.api != after.api:
+                    # 接口地址变化后旧内容不再可信
+                    self._cache.drop(item)
+                    self._last_good = {k: v for k, v in self._last_good.items() if k[0] != item}
+            if old_plan.get(item) != self._plan.get(item):
+                dirty.add(item)
+        if "prefetch_lead" in changed:
+            dirty |= set(old_sources) | set(self.sources)
+        if dirty:
+            self._dirty_items |= dirty
+            self._schedule_changed.set()
+            changes.append(f"重建调度: {', '.join(sorted(dirty))}")
+
+        if changed & {"send_rate", "send_rate_overrides"}:
+            self._rate_limiters = {}
+            changes.append("重建限速器")
+        if changed & {"command_user_limit", "command_group_limit"}:
+            self._command_buckets.clear()
+            changes.append("重建查询限流")
+        if "command_concurrency" in changed:
+            self._command_semaphore = asyncio.Semaphore(max(1, int(getattr(self.config, "command_concurrency", 5))))
+            changes.append("更新查询并发数")
+        if "send_concurrency" in changed:
+            # 进行中的发送继续使用旧的信号量
+            self._send_semaphore = asyncio.Semaphore(max(1, int(getattr(self.config, "send_concurrency", 5))))
+            changes.append("更新发送并发数")
+        if changed & {"cache_ttl", "cache_max_entries"}:
+            self._cache.ttl = getattr(self.config, "cache_ttl", 1800)
+            self._cache.max_entries = max(1, getattr(self.config, "cache_max_entries", 32))
+            changes.append("更新内容缓存参数")
+        if "image_cache_max_mb" in changed:
+            self._images.max_bytes = int(getattr(self.config, "image_cache_max_mb", 100)) * 1024 * 1024
+            self._spawn(asyncio.to_thread(self._images.enforce_cap))
+            changes.append("更新图片缓存容量")
+        if "image_profiles" in changed:
+            self._image_profiles = self._build_image_profiles()
+            self._processed.clear()
+            changes.append("更新图片处理配置")
+        if "image_workers" in changed and self._image_pool is not None:
+            # 进程池在下次处理图片时按新的进程数重建
+            self._image_pool.shutdown(wait=False)
+            self._image_pool = None
+            changes.append("更新图片处理进程数")
+        if changed & {"loop_watchdog", "loop_lag_threshold_ms"}:
+            self._start_watchdog()
+            changes.append("开启事件循环监测" if self._watchdog is not None else "关闭事件循环监测")
+        restart = sorted(changed & {"shard_count", "shard_id", "shard_db", "metrics_port"})
+        if restart:
+            changes.append(f"{', '.join(restart)} 需重新加载插件后生效")
+        logger.info(f"[配置] 检测到配置变更 {', '.join(sorted(changed))}: {'; '.join(changes) or '无需重建'}")
+        return changes
+
+    def _start_watchdog(self):
+        """按配置（重新）启动事件循环监测；未开启时停止已有的监测"""
+        if self._watchdog_task is not None:
+            self._watchdog_task.cancel()
+        if self._watchdog is not None:
+            self._watchdog.stop()
+        self._watchdog = self._watchdog_task = None
+        if not getattr(self.config, "loop_watchdog", False):
+            return
+        threshold = max(10, int(getattr(self.config, "loop_lag_threshold_ms", 200))) / 1000
+        self._watchdog = LoopWatchdog(threshold, self._metrics)
+        self._watchdog_task = asyncio.create_task(self._watchdog.run())
+        logger.info(f"[事件循环] 已开启延迟监测，停顿阈值 {threshold * 1000:.0f}ms")
+
+    def _loop_stats(self) -> str:
+        wd = self._watchdog
+        if wd is None:
+            return "未开启事件循环监测（配置 loop_watchdog）"
+        uptime = time.time() - wd.started_at
+        lines = [
+            f"【事件循环】已监测 {uptime / 60:.0f} 分钟，阈值 {wd.threshold * 1000:.0f}ms",
+            f"延迟: 当前 {wd.last_lag * 1000:.1f}ms，平均 {wd.avg_lag() * 1000:.1f}ms，最大 {wd.lag_max * 1000:.1f}ms",
+            f"停顿超过阈值: 本插件 {wd.stalls['plugin']} 次，其他代码 {wd.stalls['other']} 次",
+        ]
+        if wd.samples:
+            lines.append("【最近的停顿】")
+        for at, stalled, location, stack in reversed(wd.samples):
+            when = datetime.datetime.fromtimestamp(at).strftime("%m-%d %H:%M:%S")
+            lines.append(f"{when} 停顿 ≥{stalled * 1000:.0f}ms（{'本插件' if location == 'plugin' else '其他代码'}）")
+            lines.extend(stack)
+        return "\n".join(lines)
+
+    def _build_image_profiles(self) -> dict:
+        """解析 image_profiles：{平台前缀: ImageProfile}，未安装 Pillow 时不处理图片"""
+        profiles: dict = {}
+        for line in getattr(self.config, "image_profiles", []) or []:
+            try:
+                prefix, profile = _parse_image_profile(line)
+            except ValueError as e:
+                logger.warning(f"[图片处理] 忽略无效配置 {line}: {e}")
+                continue
+            profiles[prefix] = profile
+        if profiles and Image is None:
+            logger.warning("[图片处理] 未安装 Pillow（pip install Pillow），图片将按原图发送")
+            return {}
+        return profiles
+
+    def _init_shards(self) -> Optional[ShardCoordinator]:
+        """shard_count 大于 1 时开启分片模式，多个实例通过共享的 shard_db 文件协调"""
+        try:
+            shard_count = int(getattr(self.config, "shard_count", 1))
+            shard_id = int(getattr(self.config, "shard_id", 0))
+        except (TypeError, ValueError):
+            logger.error("[分片] shard_id/shard_count 配置无效，不启用分片")
+            return None
+        if shard_count <= 1:
+            return None
+        if not 0 <= shard_id < shard_count:
+            logger.error(f"[分片] shard_id 需在 0 到 {shard_count - 1} 之间，不启用分片")
+            return None
+        path = getattr(self.config, "shard_db", "") or os.path.join(self._data_dir, "shards.db")
+        try:
+            # 首次心跳与清理旧认领在心跳任务中进行，这里只建表
+            shards = ShardCoordinator(path, shard_id, shard_count)
+        except Exception as e:
+            logger.error(f"[分片] 初始化失败，不启用分片: {e}")
+            return None
+        logger.info(f"[分片] 已启用，本实例为 {shard_id}/{shard_count}，协调文件: {path}")
+        return shards
+
+    def _build_sources(self) -> "OrderedDict[str, ContentSource]":
+        """根据配置构建内容源注册表：内置五类内容加上 custom_sources 中的自定义内容"""
+        cfg = self.config
+        builtin = [
+            ContentSource(
+                name="news",
+                label="新闻",
+                api=getattr(cfg, "news_api", "https://api.nycnm.cn/api/v2/60s"),
+                format=getattr(cfg, "format", "image"),
+                push_time=getattr(cfg, "news_push_time", ""),
+                enabled=getattr(cfg, "enable_news", True),
+                text_extractor=_news_text,
+                image_paths=("data.image", "data.cover"),
+                commands=("新闻", "60s", "60秒", "早报"),
+                date_param=True,
+            ),
+            ContentSource(
+                name="moyu",
+                label="摸鱼日历",
+                api=getattr(cfg, "moyu_api", "https://api.nycnm.cn/api/v2/moyu"),
+                format=getattr(cfg, "moyu_format", "image"),
+                push_time=getattr(cfg, "moyu_push_time", ""),
+                enabled=getattr(cfg, "enable_moyu", True),
+                commands=("摸鱼", "摸鱼日历"),
+            ),
+            ContentSource(
+                name="gold",
+                label="金价",
+                api=getattr(cfg, "gold_api", "https://api.nycnm.cn/api/v2/jinjia"),
+                format=getattr(cfg, "gold_format", "image"),
+                push_time=getattr(cfg, "gold_push_time", ""),
+                enabled=getattr(cfg, "enable_gold", True),
+                text_extractor=_gold_text,
+                commands=("金价", "黄金"),
+            ),
+            ContentSource(
+                name="ai",
+                label="AI资讯",
+                api=getattr(cfg, "ai_api", "https://api.nycnm.cn/api/v2/aizixun"),
+                format=getattr(cfg, "ai_format", "image"),
+                push_time=getattr(cfg, "ai_push_time", ""),
+                enabled=getattr(cfg, "enable_ai", True),
+                text_extractor=_ai_text,
+                # AI 资讯在星期日和星期一不推送
+                skip_weekdays=(6, 0),
+                commands=("AI资讯", "AI新闻"),
+            ),
+            ContentSource(
+                name="history",
+                label="历史今日",
+                api=getattr(cfg, "history_api", "https://api.nycnm.cn/api/v2/history"),
+                format=getattr(cfg, "history_format", "image"),
+                push_time=getattr(cfg, "history_push_time", ""),
+                enabled=getattr(cfg, "enable_history", True),
+                text_extractor=_history_text,
+                commands=("历史今日",),
+            ),
         ]
+        sources: "OrderedDict[str, ContentSource]" = OrderedDict((s.name, s) for s in builtin)
+        for line in getattr(cfg, "custom_sources", []) or []:
+            try:
+                source = _parse_custom_source(line)
+            except ValueError as e:
+                logger.warning(f"[自定义内容] 忽略无效配置 {line}: {e}")
+                continue
+            if source.name in sources:
+                logger.warning(f"[自定义内容] 名称 {source.name} 已存在，忽略")
+                continue
+            sources[source.name] = source
+        return sources
+
+    def _build_plan(self) -> dict:
+        """
+        根据 groups 与 subscriptions 编译订阅矩阵：{内容: {推送时间点: {格式: [目标]}}}。
+        同一 (内容, 格式, 时间点) 的目标归为一组，只拉取一次后统一发送。
+        """
+        subs: dict = {}
+        for line in getattr(self.config, "subscriptions", []) or []:
+            try:
+                sub = _parse_subscription(line)
+            except ValueError as e:
+                logger.warning(f"[订阅] 忽略无效配置 {line}: {e}")
+                continue
+            items = []
+            for name in sub.items:
+                source = self._find_source(name)
+                if source is None:
+                    logger.warning(f"[订阅] {sub.target} 订阅的内容 {name} 不存在，忽略")
+                else:
+                    items.append(source.name)
+            if sub.items and not items:
+                continue
+            sub.items = tuple(items)
+            subs[sub.target] = sub
+        targets = list(dict.fromkeys([*self.config.groups, *subs]))
+        plan: dict = {item: {} for item in self.sources}
+        for target in targets:
+            sub = subs.get(target)
+            for item, source in self.sources.items():
+                if sub is not None and sub.items and item not in sub.items:
+                    continue
+                kind = (sub.format if sub is not None and sub.format else None) or source.kind
+                push_time = (sub.push_time if sub is not None else "") or source.push_time
+                for h, m in self._parse_push_times(push_time):
+                    plan[item].setdefault(f"{h:02d}:{m:02d}", {}).setdefault(kind, []).append(target)
+        return plan
+
+    def _plan_times(self, item: str) -> list:
+        """返回内容的全部推送时间点 [(时, 分)]"""
+        return sorted(tuple(map(int, slot.split(":"))) for slot in self._plan.get(item, {}))
+
+    def _slot_variants(self, item: str, slot: str = "") -> dict:
+        """返回 {格式: [目标]}：slot 为订阅矩阵中的时间点时取该时间点的目标，否则（手动推送）取全部订阅目标"""
+        slots = self._plan.get(item, {})
+        if slot in slots:
+            return slots[slot]
+        merged: dict = {}
+        for variants in slots.values():
+            for kind, targets in variants.items():
+                merged.setdefault(kind, {}).update(dict.fromkeys(targets))
+        return {kind: list(targets) for kind, targets in merged.items()}
+
+    def _source(self, item: str) -> ContentSource:
+        return self.sources[item]
 
     @filter.command_group("新闻管理")
     def mnews(self):
@@ -77,83 +1463,72 @@ class Daily60sNewsPlugin(Star):
             return f"{int(s/3600)}小时{int((s%3600)/60)}分钟"
 
         lines = ["每日60s新闻插件正在运行"]
-        for name, pt, enabled in [
-            ("新闻", self.news_push_time, self.enable_news),
-            ("摸鱼", self.moyu_push_time, self.enable_moyu),
-            ("金价", self.gold_push_time, self.enable_gold),
-            ("AI资讯", self.ai_push_time, self.enable_ai),
-            ("历史今日", self.history_push_time, self.enable_history),
-        ]:
-            if enabled:
-                t = pt or self.push_time
-                lines.append(f"{name}: {t}（下次推送: {fmt_next(pt)}）")
+        for source in self.sources.values():
+            if source.enabled:
+                t = source.push_time or self.push_time
+                lines.append(f"{source.label}: {t}（下次推送: {fmt_next(source.push_time)}）")
         yield event.plain_result("\n".join(lines))
 
-    
-
     @filter.permission_type(filter.PermissionType.ADMIN)
     @mnews.command("push")
     async def push_news(self, event: AstrMessageEvent):
         """
         手动向目标群组推送今日60s新闻（仅管理员）
         """
-        await self._send_daily_news_to_groups()
-        yield event.plain_result(f"{event.get_sender_name()}:已成功向群组推送新闻")
-
-    # 取消普通 text/image 命令
+        yield event.plain_result(await self._manual_push(event, "news"))
 
     @filter.permission_type(filter.PermissionType.ADMIN)
     @mnews.command("update_news")
     async def update_news_files(self, event: AstrMessageEvent):
-        content, ok = await self._fetch_news_text()
-        if ok:
-            yield event.plain_result(f"{event.get_sender_name()}:已拉取最新新闻\n{content[:50]}...")
-        else:
-            yield event.plain_result(f"{event.get_sender_name()}:获取失败 {content}")
+        yield event.plain_result(await self._update_source_text(event, "news"))
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @mnews.command("push_source")
+    async def push_named_source(self, event: AstrMessageEvent, name: str):
+        """手动推送指定名称的内容（含自定义内容，仅管理员）"""
+        source = self._find_source(name)
+        if source is None:
+            yield event.plain_result(f"未找到内容: {name}，可选: {'、'.join(s.label for s in self.sources.values())}")
+            return
+        yield event.plain_result(await self._manual_push(event, source.name))
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @mnews.command("update_source")
+    async def update_named_source(self, event: AstrMessageEvent, name: str):
+        """实时拉取指定名称的内容（含自定义内容，仅管理员）"""
+        source = self._find_source(name)
+        if source is None:
+            yield event.plain_result(f"未找到内容: {name}")
+            return
+        yield event.plain_result(await self._update_source_text(event, source.name))
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @mnews.command("metrics")
+    async def show_metrics(self, event: AstrMessageEvent):
+        """汇总接口、缓存与推送耗时指标（仅管理员）"""
+        yield event.plain_result(self._metrics_summary())
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @mnews.command("loop")
+    async def show_loop_stats(self, event: AstrMessageEvent):
+        """事件循环延迟与最近的停顿调用栈（仅管理员）"""
+        yield event.plain_result(self._loop_stats())
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @mnews.command("reload")
+    async def reload_config(self, event: AstrMessageEvent):
+        """重新读取配置并只重建变化的部分（仅管理员）"""
+        self._load_config_file(force=True)
+        changes = self._apply_config()
+        yield event.plain_result("配置已重新加载:\n" + "\n".join(changes) if changes else "配置没有变化")
 
     @mnews.command("今日")
     async def get_today_news(self, event: AstrMessageEvent):
-        try:
-            if self.format == "image":
-                path, ok = await self._fetch_news_image_path()
-                if ok:
-                    await event.send(MessageChain().file_image(path))
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-                else:
-                    await event.send(event.plain_result(str(path)))
-            else:
-                content, ok = await self._fetch_news_text()
-                if ok:
-                    await event.send(event.plain_result(content))
-                else:
-                    await event.send(event.plain_result(str(content)))
-        except Exception as e:
-            await event.send(event.plain_result(f"获取新闻失败: {e}"))
+        await self._reply_source(event, "news")
 
     @filter.command("新闻")
     async def cmd_news(self, event: AstrMessageEvent):
-        try:
-            if self.format == "image":
-                path, ok = await self._fetch_news_image_path()
-                if ok:
-                    await event.send(MessageChain().file_image(path))
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-                else:
-                    await event.send(event.plain_result(str(path)))
-            else:
-                content, ok = await self._fetch_news_text()
-                if ok:
-                    await event.send(event.plain_result(content))
-                else:
-                    await event.send(event.plain_result(str(content)))
-        except Exception as e:
-            await event.send(event.plain_result(f"获取新闻失败: {e}"))
+        await self._reply_source(event, "news")
 
     @filter.command("60s")
     async def cmd_60s(self, event: AstrMessageEvent):
@@ -167,378 +1542,36 @@ class Daily60sNewsPlugin(Star):
     async def cmd_morning_news(self, event: AstrMessageEvent):
         await self.cmd_news(event)
 
-    async def terminate(self):
-        """插件卸载时调用"""
-        for t in getattr(self, "_tasks", []):
-            t.cancel()
-        logger.info("每日60s新闻插件: 定时任务已停止")
-
-    async def _fetch_news_text(self) -> Tuple[str, bool]:
-        retries = 3
-        timeout = self.timeout
-        fmt = self.format
-        if fmt == "image":
-            fmt = "json"
-        date = datetime.datetime.now().strftime("%Y-%m-%d")
-        for attempt in range(retries):
-            try:
-                url = f"{self.news_api}?date={date}&format={fmt}"
-                if self.api_key:
-                    url += f"&apikey={self.api_key}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=timeout) as response:
-                        if response.status != 200:
-                            raise Exception(f"API返回错误代码: {response.status}")
-                        if fmt == "json":
-                            data = await response.json()
-                            payload = data.get("data", {}) if isinstance(data, dict) else {}
-                            date_str = payload.get("date") or date
-                            tip = payload.get("tip") or ""
-                            news_list = payload.get("news") or []
-                            lines = [f"{date_str} 每日60秒新闻", *(f"• {item}" for item in news_list)]
-                            if tip:
-                                lines.append(f"提示：{tip}")
-                            return "\n".join(lines), True
-                        else:
-                            content = await response.read()
-                            text = content.decode("utf-8", errors="ignore")
-                            return text, True
-            except Exception as e:
-                logger.error(f"[mnews] 请求失败 {attempt + 1}/{retries}: {e}")
-                if attempt == retries - 1:
-                    return f"接口报错，请联系管理员:{e}", False
-                await asyncio.sleep(1)
-
-    async def _fetch_news_image_path(self) -> Tuple[str, bool]:
-        retries = 3
-        timeout = self.timeout
-        fmt = self.format
-        if fmt == "text":
-            fmt = "json"
-        date = datetime.datetime.now().strftime("%Y-%m-%d")
-        for attempt in range(retries):
-            try:
-                url = f"{self.news_api}?date={date}&format={fmt}"
-                if self.api_key:
-                    url += f"&apikey={self.api_key}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=timeout) as response:
-                        if response.status != 200:
-                            raise Exception(f"API返回错误代码: {response.status}")
-                        if fmt == "json":
-                            data = await response.json()
-                            payload = data.get("data", {}) if isinstance(data, dict) else {}
-                            img_url = payload.get("image") or payload.get("cover")
-                            if not img_url:
-                                raise Exception("JSON中未找到图片URL")
-                            async with session.get(img_url, timeout=timeout) as img_resp:
-                                if img_resp.status != 200:
-                                    raise Exception(f"图片下载失败，状态码: {img_resp.status}")
-                                img_bytes = await img_resp.read()
-                                f = tempfile.NamedTemporaryFile(delete=False, suffix=".jpeg")
-                                try:
-                                    f.write(img_bytes)
-                                    f.flush()
-                                    return f.name, True
-                                finally:
-                                    f.close()
-                        else:
-                            img_bytes = await response.read()
-                            f = tempfile.NamedTemporaryFile(delete=False, suffix=".jpeg")
-                            try:
-                                f.write(img_bytes)
-                                f.flush()
-                                return f.name, True
-                            finally:
-                                f.close()
-            except Exception as e:
-                logger.error(f"[mnews] 请求失败 {attempt + 1}/{retries}: {e}")
-                if attempt == retries - 1:
-                    return f"接口报错，请联系管理员:{e}", False
-                await asyncio.sleep(1)
-
-    async def _send_daily_news_to_groups(self):
-        """
-        推送新闻到所有目标群组
-        """
-        try:
-            if self.format == "image":
-                news_path, ok = await self._fetch_news_image_path()
-                if not ok:
-                    raise Exception(str(news_path))
-                for target in self.config.groups:
-                    mc = MessageChain().file_image(news_path)
-                    await self.context.send_message(target, mc)
-                    await asyncio.sleep(2)
-                try:
-                    os.remove(news_path)
-                except Exception:
-                    pass
-            else:
-                news_content, ok = await self._fetch_news_text()
-                if not ok:
-                    raise Exception(str(news_content))
-                for target in self.config.groups:
-                    mc = MessageChain().message(news_content)
-                    await self.context.send_message(target, mc)
-                    await asyncio.sleep(2)
-        except Exception as e:
-            error_message = str(e) if str(e) else "未知错误"
-            logger.error(f"[每日新闻] 推送新闻失败: {error_message}")
-            logger.exception("详细错误信息：")
-
-    def _calculate_sleep_time(self, push_time: str = "") -> float:
-        """计算距离下次推送的秒数，push_time 为空则使用全局 push_time"""
-        now = datetime.datetime.now()
-        time_str = (push_time or self.push_time).replace("，", ",")
-        candidates = []
-        for t_str in time_str.split(","):
-            parts = t_str.strip().split(":")
-            if len(parts) != 2:
-                continue
-            try:
-                h, m = map(int, parts)
-                target = now.replace(hour=h, minute=m, second=0, microsecond=0)
-                if target <= now:
-                    target += datetime.timedelta(days=1)
-                candidates.append(target)
-            except ValueError:
-                continue
-        if not candidates:
-            target = now.replace(hour=8, minute=0, second=0, microsecond=0)
-            if target <= now:
-                target += datetime.timedelta(days=1)
-            candidates.append(target)
-        return (min(candidates) - now).total_seconds()
-
-    
-
-    async def _item_task(self, item: str):
-        """各内容类型独立定时任务"""
-        push_time_map = {
-            "news": self.news_push_time,
-            "moyu": self.moyu_push_time,
-            "gold": self.gold_push_time,
-            "ai": self.ai_push_time,
-            "history": self.history_push_time,
-        }
-        push_time = push_time_map.get(item, "")
-        while True:
-            try:
-                sleep_time = self._calculate_sleep_time(push_time)
-                logger.info(f"[{item}] 下次推送将在 {sleep_time / 3600:.2f} 小时后")
-                await asyncio.sleep(sleep_time)
-                if item == "news" and self.enable_news:
-                    await self._send_daily_news_to_groups()
-                elif item == "moyu" and self.enable_moyu:
-                    await self._moyu_send_to_groups()
-                elif item == "gold" and self.enable_gold:
-                    await self._gold_send_to_groups()
-                elif item == "ai" and self.enable_ai:
-                    _w = datetime.datetime.now().weekday()
-                    if _w not in (6, 0):
-                        await self._ai_send_to_groups()
-                    else:
-                        logger.info("[AI资讯] 星期日或星期一不推送")
-                elif item == "history" and self.enable_history:
-                    await self._send_history_to_groups()
-                await asyncio.sleep(60)
-            except Exception as e:
-                logger.error(f"[{item}] 定时任务出错: {e}")
-                traceback.print_exc()
-                await asyncio.sleep(300)
-
-
     @filter.command_group("摸鱼管理")
     def moyu(self):
         pass
 
-    # 取消普通摸鱼获取命令，保留管理员与定时推送
-
     @filter.permission_type(filter.PermissionType.ADMIN)
     @moyu.command("status")
     async def cmd_status(self, event: AstrMessageEvent):
-        sleep_time = self._calculate_sleep_time()
-        h = int(sleep_time / 3600)
-        m = int((sleep_time % 3600) / 60)
-        yield event.plain_result(
-            f"摸鱼日历运行中\n推送时间: {self.push_time}\n默认格式: {self.moyu_format}\n距离下次推送: {h}小时{m}分钟"
-        )
-
-    
+        yield event.plain_result(self._source_status("moyu"))
 
     @filter.permission_type(filter.PermissionType.ADMIN)
     @moyu.command("push")
     async def cmd_push(self, event: AstrMessageEvent):
-        await self._moyu_send_to_groups()
-        yield event.plain_result(f"{event.get_sender_name()}: 已向群组推送摸鱼日历")
+        yield event.plain_result(await self._manual_push(event, "moyu"))
 
     @filter.permission_type(filter.PermissionType.ADMIN)
     @moyu.command("update")
     async def cmd_update(self, event: AstrMessageEvent):
-        content, ok = await self._moyu_fetch_text()
-        if ok:
-            yield event.plain_result(f"{event.get_sender_name()}:已拉取最新摸鱼\n{content[:50]}...")
-        else:
-            yield event.plain_result(f"{event.get_sender_name()}:获取失败 {content}")
+        yield event.plain_result(await self._update_source_text(event, "moyu"))
 
     @moyu.command("今日")
     async def moyu_today(self, event: AstrMessageEvent):
-        try:
-            fmt = self.moyu_format
-            if fmt == "text":
-                content, ok = await self._moyu_fetch_text()
-                if ok:
-                    yield event.plain_result(content)
-                else:
-                    yield event.plain_result(str(content))
-            else:
-                path, ok = await self._moyu_fetch_image_path()
-                if ok:
-                    yield MessageChain().file_image(path)
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-                else:
-                    yield event.plain_result(str(path))
-        except Exception as e:
-            yield event.plain_result(f"获取摸鱼日历失败: {e}")
-    async def _moyu_fetch_text(self) -> Tuple[str, bool]:
-        retries = 3
-        timeout = self.timeout
-        fmt = self.moyu_format
-        if fmt == "image":
-            fmt = "json"
-        for attempt in range(retries):
-            try:
-                url = f"{self.moyu_api}?format={fmt}"
-                if self.api_key:
-                    url += f"&apikey={self.api_key}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=timeout) as resp:
-                        if resp.status != 200:
-                            raise Exception(f"状态码: {resp.status}")
-                        if fmt == "json":
-                            data = await resp.json(content_type=None)
-                            txt = None
-                            def walk(v):
-                                nonlocal txt
-                                if isinstance(v, dict):
-                                    for vv in v.values():
-                                        walk(vv)
-                                elif isinstance(v, list):
-                                    for vv in v:
-                                        walk(vv)
-                                elif isinstance(v, str):
-                                    txt = txt or v
-                            walk(data)
-                            return (txt or str(data)), True
-                        else:
-                            content = await resp.read()
-                            text = content.decode("utf-8", errors="ignore")
-                            return text, True
-            except Exception as e:
-                logger.error(f"[moyu] 请求失败 {attempt + 1}/{retries}: {e}")
-                if attempt == retries - 1:
-                    return f"接口报错: {e}", False
-                await asyncio.sleep(1)
-
-    async def _moyu_fetch_image_path(self) -> Tuple[str, bool]:
-        retries = 3
-        timeout = self.timeout
-        fmt = self.moyu_format
-        if fmt == "text":
-            fmt = "json"
-        for attempt in range(retries):
-            try:
-                url = f"{self.moyu_api}?format={fmt}"
-                if self.api_key:
-                    url += f"&apikey={self.api_key}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=timeout) as resp:
-                        if resp.status != 200:
-                            raise Exception(f"状态码: {resp.status}")
-                        if fmt == "json":
-                            data = await resp.json(content_type=None)
-                            img_url = None
-                            def walk(v):
-                                nonlocal img_url
-                                if isinstance(v, dict):
-                                    for vv in v.values():
-                                        walk(vv)
-                                elif isinstance(v, list):
-                                    for vv in v:
-                                        walk(vv)
-                                elif isinstance(v, str):
-                                    if v.startswith("http") and (".jpg" in v or ".jpeg" in v or ".png" in v):
-                                        img_url = img_url or v
-                            walk(data)
-                            if not img_url:
-                                raise Exception("JSON未找到图片URL")
-                            async with session.get(img_url, timeout=timeout) as ir:
-                                if ir.status != 200:
-                                    raise Exception(f"图片状态码: {ir.status}")
-                                b = await ir.read()
-                                f = tempfile.NamedTemporaryFile(delete=False, suffix=".jpeg")
-                                try:
-                                    f.write(b)
-                                    f.flush()
-                                    return f.name, True
-                                finally:
-                                    f.close()
-                        else:
-                            b = await resp.read()
-                            f = tempfile.NamedTemporaryFile(delete=False, suffix=".jpeg")
-                            try:
-                                f.write(b)
-                                f.flush()
-                                return f.name, True
-                            finally:
-                                f.close()
-            except Exception as e:
-                logger.error(f"[moyu] 请求失败 {attempt + 1}/{retries}: {e}")
-                if attempt == retries - 1:
-                    return f"接口报错: {e}", False
-                await asyncio.sleep(1)
-
-    async def _moyu_send_to_groups(self):
-        try:
-            if self.moyu_format == "text":
-                content, ok = await self._moyu_fetch_text()
-                if not ok:
-                    raise Exception(str(content))
-                for target in self.config.groups:
-                    mc = MessageChain().message(content)
-                    await self.context.send_message(target, mc)
-                    await asyncio.sleep(2)
-            else:
-                path, ok = await self._moyu_fetch_image_path()
-                if not ok:
-                    raise Exception(str(path))
-                for target in self.config.groups:
-                    mc = MessageChain().file_image(path)
-                    await self.context.send_message(target, mc)
-                    await asyncio.sleep(2)
-                try:
-                    os.remove(path)
-                except Exception:
-                    pass
-        except Exception as e:
-            logger.error(f"[moyu] 推送失败: {e}")
-
-    def _moyu_calculate_sleep_time(self) -> float:
-        now = datetime.datetime.now()
-        h, m = map(int, self.moyu_push_time.split(":"))
-        next_push = now.replace(hour=h, minute=m, second=0, microsecond=0)
-        if next_push <= now:
-            next_push += datetime.timedelta(days=1)
-        return (next_push - now).total_seconds()
+        await self._reply_source(event, "moyu")
 
-    
+    @filter.command("摸鱼")
+    async def cmd_moyu_simple(self, event: AstrMessageEvent):
+        await self._reply_source(event, "moyu")
 
-    async def _moyu_daily_task(self):
-        pass
+    @filter.command("摸鱼日历")
+    async def cmd_moyu_calendar(self, event: AstrMessageEvent):
+        await self.cmd_moyu_simple(event)
 
     @filter.command_group("金价管理")
     def gold(self):
@@ -547,187 +1580,29 @@ class Daily60sNewsPlugin(Star):
     @filter.permission_type(filter.PermissionType.ADMIN)
     @gold.command("status")
     async def gold_status(self, event: AstrMessageEvent):
-        sleep_time = self._calculate_sleep_time()
-        h = int(sleep_time / 3600)
-        m = int((sleep_time % 3600) / 60)
-        yield event.plain_result(
-            f"今日金价运行中\n推送时间: {self.push_time}\n默认格式: {self.gold_format}\n距离下次推送: {h}小时{m}分钟"
-        )
-
-    
+        yield event.plain_result(self._source_status("gold"))
 
     @filter.permission_type(filter.PermissionType.ADMIN)
     @gold.command("push")
     async def gold_push(self, event: AstrMessageEvent):
-        await self._gold_send_to_groups()
-        yield event.plain_result(f"{event.get_sender_name()}: 已向群组推送今日金价")
+        yield event.plain_result(await self._manual_push(event, "gold"))
 
     @filter.permission_type(filter.PermissionType.ADMIN)
     @gold.command("update")
     async def gold_update(self, event: AstrMessageEvent):
-        content, ok = await self._gold_fetch_text()
-        if ok:
-            yield event.plain_result(f"{event.get_sender_name()}:已拉取最新金价\n{content[:50]}...")
-        else:
-            yield event.plain_result(f"{event.get_sender_name()}:获取失败 {content}")
+        yield event.plain_result(await self._update_source_text(event, "gold"))
 
     @gold.command("今日")
     async def gold_today(self, event: AstrMessageEvent):
-        try:
-            fmt = self.gold_format
-            if fmt == "text":
-                content, ok = await self._gold_fetch_text()
-                if ok:
-                    yield event.plain_result(content)
-                else:
-                    yield event.plain_result(str(content))
-            else:
-                path, ok = await self._gold_fetch_image_path()
-                if ok:
-                    yield MessageChain().file_image(path)
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-                else:
-                    yield event.plain_result(str(path))
-        except Exception as e:
-            yield event.plain_result(f"获取金价失败: {e}")
-    async def _gold_fetch_text(self) -> Tuple[str, bool]:
-        retries = 3
-        timeout = self.timeout
-        fmt = self.gold_format
-        if fmt == "image":
-            fmt = "json"
-        for attempt in range(retries):
-            try:
-                url = f"{self.gold_api}?format={fmt}"
-                if self.api_key:
-                    url += f"&apikey={self.api_key}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=timeout) as resp:
-                        if resp.status != 200:
-                            raise Exception(f"状态码: {resp.status}")
-                        if fmt == "json":
-                            data = await resp.json(content_type=None)
-                            txt = None
-                            def walk(v):
-                                nonlocal txt
-                                if isinstance(v, dict):
-                                    for vv in v.values():
-                                        walk(vv)
-                                elif isinstance(v, list):
-                                    for vv in v:
-                                        walk(vv)
-                                elif isinstance(v, str):
-                                    txt = txt or v
-                            walk(data)
-                            return (txt or str(data)), True
-                        else:
-                            content = await resp.read()
-                            text = content.decode("utf-8", errors="ignore")
-                            return text, True
-            except Exception as e:
-                logger.error(f"[gold] 请求失败 {attempt + 1}/{retries}: {e}")
-                if attempt == retries - 1:
-                    return f"接口报错: {e}", False
-                await asyncio.sleep(1)
-
-    async def _gold_fetch_image_path(self) -> Tuple[str, bool]:
-        retries = 3
-        timeout = self.timeout
-        fmt = self.gold_format
-        if fmt == "text":
-            fmt = "json"
-        for attempt in range(retries):
-            try:
-                url = f"{self.gold_api}?format={fmt}"
-                if self.api_key:
-                    url += f"&apikey={self.api_key}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=timeout) as resp:
-                        if resp.status != 200:
-                            raise Exception(f"状态码: {resp.status}")
-                        if fmt == "json":
-                            data = await resp.json(content_type=None)
-                            img_url = None
-                            def walk(v):
-                                nonlocal img_url
-                                if isinstance(v, dict):
-                                    for vv in v.values():
-                                        walk(vv)
-                                elif isinstance(v, list):
-                                    for vv in v:
-                                        walk(vv)
-                                elif isinstance(v, str):
-                                    if v.startswith("http") and (".jpg" in v or ".jpeg" in v or ".png" in v):
-                                        img_url = img_url or v
-                            walk(data)
-                            if not img_url:
-                                raise Exception("JSON未找到图片URL")
-                            async with session.get(img_url, timeout=timeout) as ir:
-                                if ir.status != 200:
-                                    raise Exception(f"图片状态码: {ir.status}")
-                                b = await ir.read()
-                                f = tempfile.NamedTemporaryFile(delete=False, suffix=".jpeg")
-                                try:
-                                    f.write(b)
-                                    f.flush()
-                                    return f.name, True
-                                finally:
-                                    f.close()
-                        else:
-                            b = await resp.read()
-                            f = tempfile.NamedTemporaryFile(delete=False, suffix=".jpeg")
-                            try:
-                                f.write(b)
-                                f.flush()
-                                return f.name, True
-                            finally:
-                                f.close()
-            except Exception as e:
-                logger.error(f"[gold] 请求失败 {attempt + 1}/{retries}: {e}")
-                if attempt == retries - 1:
-                    return f"接口报错: {e}", False
-                await asyncio.sleep(1)
+        await self._reply_source(event, "gold")
 
-    async def _gold_send_to_groups(self):
-        try:
-            if self.gold_format == "text":
-                content, ok = await self._gold_fetch_text()
-                if not ok:
-                    raise Exception(str(content))
-                for target in self.config.groups:
-                    mc = MessageChain().message(content)
-                    await self.context.send_message(target, mc)
-                    await asyncio.sleep(2)
-            else:
-                path, ok = await self._gold_fetch_image_path()
-                if not ok:
-                    raise Exception(str(path))
-                for target in self.config.groups:
-                    mc = MessageChain().file_image(path)
-                    await self.context.send_message(target, mc)
-                    await asyncio.sleep(2)
-                try:
-                    os.remove(path)
-                except Exception:
-                    pass
-        except Exception as e:
-            logger.error(f"[gold] 推送失败: {e}")
-
-    def _gold_calculate_sleep_time(self) -> float:
-        now = datetime.datetime.now()
-        h, m = map(int, self.gold_push_time.split(":"))
-        next_push = now.replace(hour=h, minute=m, second=0, microsecond=0)
-        if next_push <= now:
-            next_push += datetime.timedelta(days=1)
-        return (next_push - now).total_seconds()
-
-    
+    @filter.command("金价")
+    async def cmd_gold_simple(self, event: AstrMessageEvent):
+        await self._reply_source(event, "gold")
 
-    async def _gold_daily_task(self):
-        pass
+    @filter.command("黄金")
+    async def cmd_gold_alt(self, event: AstrMessageEvent):
+        await self.cmd_gold_simple(event)
 
     @filter.command_group("AI资讯管理")
     def ai(self):
@@ -736,258 +1611,25 @@ class Daily60sNewsPlugin(Star):
     @filter.permission_type(filter.PermissionType.ADMIN)
     @ai.command("status")
     async def ai_status(self, event: AstrMessageEvent):
-        sleep_time = self._calculate_sleep_time()
-        h = int(sleep_time / 3600)
-        m = int((sleep_time % 3600) / 60)
-        yield event.plain_result(
-            f"AI资讯运行中\n推送时间: {self.push_time}\n默认格式: {self.ai_format}\n距离下次推送: {h}小时{m}分钟"
-        )
-
-    
+        yield event.plain_result(self._source_status("ai"))
 
     @filter.permission_type(filter.PermissionType.ADMIN)
     @ai.command("push")
     async def ai_push(self, event: AstrMessageEvent):
-        await self._ai_send_to_groups()
-        yield event.plain_result(f"{event.get_sender_name()}: 已向群组推送AI资讯")
+        yield event.plain_result(await self._manual_push(event, "ai"))
 
     @filter.permission_type(filter.PermissionType.ADMIN)
     @ai.command("update")
     async def ai_update(self, event: AstrMessageEvent):
-        content, ok = await self._ai_fetch_text()
-        if ok:
-            yield event.plain_result(f"{event.get_sender_name()}:已拉取最新AI资讯\n{content[:50]}...")
-        else:
-            yield event.plain_result(f"{event.get_sender_name()}:获取失败 {content}")
+        yield event.plain_result(await self._update_source_text(event, "ai"))
 
     @ai.command("今日")
     async def ai_today(self, event: AstrMessageEvent):
-        try:
-            fmt = self.ai_format
-            if fmt == "text":
-                content, ok = await self._ai_fetch_text()
-                if ok:
-                    yield event.plain_result(content)
-                else:
-                    yield event.plain_result(str(content))
-            else:
-                path, ok = await self._ai_fetch_image_path()
-                if ok:
-                    yield MessageChain().file_image(path)
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-                else:
-                    yield event.plain_result(str(path))
-        except Exception as e:
-            yield event.plain_result(f"获取AI资讯失败: {e}")
-    async def _ai_fetch_text(self) -> Tuple[str, bool]:
-        retries = 3
-        timeout = self.timeout
-        fmt = self.ai_format
-        if fmt == "image":
-            fmt = "json"
-        for attempt in range(retries):
-            try:
-                url = f"{self.ai_api}?format={fmt}"
-                if self.api_key:
-                    url += f"&apikey={self.api_key}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=timeout) as resp:
-                        if resp.status != 200:
-                            raise Exception(f"状态码: {resp.status}")
-                        if fmt == "json":
-                            data = await resp.json(content_type=None)
-                            txt = None
-                            def walk(v):
-                                nonlocal txt
-                                if isinstance(v, dict):
-                                    for vv in v.values():
-                                        walk(vv)
-                                elif isinstance(v, list):
-                                    for vv in v:
-                                        walk(vv)
-                                elif isinstance(v, str):
-                                    txt = txt or v
-                            walk(data)
-                            return (txt or str(data)), True
-                        else:
-                            content = await resp.read()
-                            text = content.decode("utf-8", errors="ignore")
-                            return text, True
-            except Exception as e:
-                logger.error(f"[ai] 请求失败 {attempt + 1}/{retries}: {e}")
-                if attempt == retries - 1:
-                    return f"接口报错: {e}", False
-                await asyncio.sleep(1)
-
-    async def _ai_fetch_image_path(self) -> Tuple[str, bool]:
-        retries = 3
-        timeout = self.timeout
-        fmt = self.ai_format
-        if fmt == "text":
-            fmt = "json"
-        for attempt in range(retries):
-            try:
-                url = f"{self.ai_api}?format={fmt}"
-                if self.api_key:
-                    url += f"&apikey={self.api_key}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=timeout) as resp:
-                        if resp.status != 200:
-                            raise Exception(f"状态码: {resp.status}")
-                        if fmt == "json":
-                            data = await resp.json(content_type=None)
-                            img_url = None
-                            def walk(v):
-                                nonlocal img_url
-                                if isinstance(v, dict):
-                                    for vv in v.values():
-                                        walk(vv)
-                                elif isinstance(v, list):
-                                    for vv in v:
-                                        walk(vv)
-                                elif isinstance(v, str):
-                                    if v.startswith("http") and (".jpg" in v or ".jpeg" in v or ".png" in v):
-                                        img_url = img_url or v
-                            walk(data)
-                            if not img_url:
-                                raise Exception("JSON未找到图片URL")
-                            async with session.get(img_url, timeout=timeout) as ir:
-                                if ir.status != 200:
-                                    raise Exception(f"图片状态码: {ir.status}")
-                                b = await ir.read()
-                                f = tempfile.NamedTemporaryFile(delete=False, suffix=".jpeg")
-                                try:
-                                    f.write(b)
-                                    f.flush()
-                                    return f.name, True
-                                finally:
-                                    f.close()
-                        else:
-                            b = await resp.read()
-                            f = tempfile.NamedTemporaryFile(delete=False, suffix=".jpeg")
-                            try:
-                                f.write(b)
-                                f.flush()
-                                return f.name, True
-                            finally:
-                                f.close()
-            except Exception as e:
-                logger.error(f"[ai] 请求失败 {attempt + 1}/{retries}: {e}")
-                if attempt == retries - 1:
-                    return f"接口报错: {e}", False
-                await asyncio.sleep(1)
-
-    async def _ai_send_to_groups(self):
-        try:
-            if self.ai_format == "text":
-                content, ok = await self._ai_fetch_text()
-                if not ok:
-                    raise Exception(str(content))
-                for target in self.config.groups:
-                    mc = MessageChain().message(content)
-                    await self.context.send_message(target, mc)
-                    await asyncio.sleep(2)
-            else:
-                path, ok = await self._ai_fetch_image_path()
-                if not ok:
-                    raise Exception(str(path))
-                for target in self.config.groups:
-                    mc = MessageChain().file_image(path)
-                    await self.context.send_message(target, mc)
-                    await asyncio.sleep(2)
-                try:
-                    os.remove(path)
-                except Exception:
-                    pass
-        except Exception as e:
-            logger.error(f"[ai] 推送失败: {e}")
-
-    def _ai_calculate_sleep_time(self) -> float:
-        now = datetime.datetime.now()
-        h, m = map(int, self.ai_push_time.split(":"))
-        next_push = now.replace(hour=h, minute=m, second=0, microsecond=0)
-        if next_push <= now:
-            next_push += datetime.timedelta(days=1)
-        return (next_push - now).total_seconds()
-
-    
-
-    async def _ai_daily_task(self):
-        pass
-    @filter.command("摸鱼")
-    async def cmd_moyu_simple(self, event: AstrMessageEvent):
-        try:
-            if self.moyu_format == "text":
-                content, ok = await self._moyu_fetch_text()
-                if ok:
-                    await event.send(event.plain_result(content))
-                else:
-                    await event.send(event.plain_result(str(content)))
-            else:
-                path, ok = await self._moyu_fetch_image_path()
-                if ok:
-                    await event.send(MessageChain().file_image(path))
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-                else:
-                    await event.send(event.plain_result(str(path)))
-        except Exception as e:
-            await event.send(event.plain_result(f"获取摸鱼日历失败: {e}"))
+        await self._reply_source(event, "ai")
 
-    @filter.command("摸鱼日历")
-    async def cmd_moyu_calendar(self, event: AstrMessageEvent):
-        await self.cmd_moyu_simple(event)
-    @filter.command("金价")
-    async def cmd_gold_simple(self, event: AstrMessageEvent):
-        try:
-            if self.gold_format == "text":
-                content, ok = await self._gold_fetch_text()
-                if ok:
-                    await event.send(event.plain_result(content))
-                else:
-                    await event.send(event.plain_result(str(content)))
-            else:
-                path, ok = await self._gold_fetch_image_path()
-                if ok:
-                    await event.send(MessageChain().file_image(path))
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-                else:
-                    await event.send(event.plain_result(str(path)))
-        except Exception as e:
-            await event.send(event.plain_result(f"获取金价失败: {e}"))
-
-    @filter.command("黄金")
-    async def cmd_gold_alt(self, event: AstrMessageEvent):
-        await self.cmd_gold_simple(event)
     @filter.command("AI资讯")
     async def cmd_ai_simple(self, event: AstrMessageEvent):
-        try:
-            if self.ai_format == "text":
-                content, ok = await self._ai_fetch_text()
-                if ok:
-                    await event.send(event.plain_result(content))
-                else:
-                    await event.send(event.plain_result(str(content)))
-            else:
-                path, ok = await self._ai_fetch_image_path()
-                if ok:
-                    await event.send(MessageChain().file_image(path))
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-                else:
-                    await event.send(event.plain_result(str(path)))
-        except Exception as e:
-            await event.send(event.plain_result(f"获取AI资讯失败: {e}"))
+        await self._reply_source(event, "ai")
 
     @filter.command("AI新闻")
     async def cmd_ai_news(self, event: AstrMessageEvent):
@@ -1000,169 +1642,1071 @@ class Daily60sNewsPlugin(Star):
     @filter.permission_type(filter.PermissionType.ADMIN)
     @history.command("status")
     async def history_status(self, event: AstrMessageEvent):
-        sleep_time = self._calculate_sleep_time()
-        h = int(sleep_time / 3600)
-        m = int((sleep_time % 3600) / 60)
-        yield event.plain_result(
-            f"历史今日运行中\n推送时间: {self.push_time}\n默认格式: {self.history_format}\n距离下次推送: {h}小时{m}分钟"
-        )
+        yield event.plain_result(self._source_status("history"))
 
     @filter.permission_type(filter.PermissionType.ADMIN)
     @history.command("push")
     async def history_push(self, event: AstrMessageEvent):
-        await self._send_history_to_groups()
-        yield event.plain_result(f"{event.get_sender_name()}: 已向群组推送历史今日")
+        yield event.plain_result(await self._manual_push(event, "history"))
 
     @filter.permission_type(filter.PermissionType.ADMIN)
     @history.command("update")
     async def history_update(self, event: AstrMessageEvent):
-        content, ok = await self._fetch_history_text()
-        if ok:
-            yield event.plain_result(f"{event.get_sender_name()}:已拉取最新历史今日\n{content[:50]}...")
-        else:
-            yield event.plain_result(f"{event.get_sender_name()}:获取失败 {content}")
+        yield event.plain_result(await self._update_source_text(event, "history"))
 
     @filter.command("历史今日")
     async def cmd_history_simple(self, event: AstrMessageEvent):
+        await self._reply_source(event, "history")
+
+    @filter.event_message_type(filter.EventMessageType.ALL)
+    async def on_custom_source_command(self, event: AstrMessageEvent):
+        """响应自定义内容配置的查询指令"""
+        if not getattr(event, "is_at_or_wake_command", False):
+            return
+        text = (event.message_str or "").strip()
+        for source in self.sources.values():
+            if source.name in BUILTIN_SOURCE_NAMES:
+                continue
+            if text in source.commands:
+                await self._reply_source(event, source.name)
+                event.stop_event()
+                return
+
+    async def terminate(self):
+        """插件卸载时调用"""
+        for t in getattr(self, "_tasks", []):
+            t.cancel()
+        for t in list(getattr(self, "_push_tasks", [])):
+            t.cancel()
+        if getattr(self, "_watchdog", None) is not None:
+            self._watchdog_task.cancel()
+            self._watchdog.stop()
+            self._watchdog = self._watchdog_task = None
+        logger.info("每日60s新闻插件: 定时任务已停止")
+        session = getattr(self, "_session", None)
+        if session is not None and not session.closed:
+            await session.close()
+        self._session = None
+        for t in list(self._inflight.values()):
+            t.cancel()
+        self._cache.clear()
+        if self._ledger is not None:
+            self._ledger.close()
+            self._ledger = None
+        if self._shards is not None:
+            shards, self._shards = self._shards, None
+            try:
+                await asyncio.to_thread(shards.leave)
+            except Exception as e:
+                logger.warning(f"[分片] 注销心跳失败: {e}")
+            await asyncio.to_thread(shards.close)
+        if self._metrics_runner is not None:
+            await self._metrics_runner.cleanup()
+            self._metrics_runner = None
+        if self._image_pool is not None:
+            self._image_pool.shutdown(wait=False, cancel_futures=True)
+            self._image_pool = None
+
+    def _metrics_summary(self) -> str:
+        m = self._metrics
+
+        def fmt_p95(v: float) -> str:
+            return f">{LATENCY_BUCKETS[-1]}s" if v == float("inf") else f"≤{v:g}s"
+
+        lines = ["【接口请求】"]
+        fetch_errors = m.counter_totals("fetch_attempts_total", "source", result="error")
+        for item, (count, avg, p95) in sorted(m.hist_summary("fetch_seconds", "source").items()):
+            lines.append(f"{item}: {count} 次，失败 {fetch_errors.get(item, 0):g}，平均 {avg:.2f}s，p95 {fmt_p95(p95)}")
+        lines.append("【内容缓存】")
+        hits = m.counter_totals("cache_requests_total", "result")
+        total = hits.get("hit", 0) + hits.get("miss", 0)
+        ratio = hits.get("hit", 0) / total * 100 if total else 0.0
+        lines.append(f"命中率 {ratio:.1f}%（{hits.get('hit', 0):g}/{total:g}）")
+        images = m.hist_summary("image_download_seconds", "")
+        if images:
+            count, avg, p95 = images[""]
+            sizes = m.hist_summary("image_download_bytes", "").get("", (0, 0.0, 0))
+            lines.append(f"图片下载 {count} 次，平均 {avg:.2f}s，p95 {fmt_p95(p95)}，平均大小 {sizes[1] / 1024:.0f}KB")
+        lines.append("【消息发送】")
+        send_ok = m.counter_totals("send_total", "platform", result="ok")
+        for platform, (count, avg, p95) in sorted(m.hist_summary("send_seconds", "platform").items()):
+            lines.append(f"{platform}: {count} 次，失败 {count - send_ok.get(platform, 0):g}，平均 {avg:.2f}s，p95 {fmt_p95(p95)}")
+        lines.append("【推送耗时】")
+        for item, (count, avg, p95) in sorted(m.hist_summary("push_run_seconds", "source").items()):
+            lines.append(f"{item}: {count} 次，平均 {avg:.1f}s，p95 {fmt_p95(p95)}")
+        return "\n".join(lines)
+
+    async def _start_metrics_server(self):
+        """metrics_port 大于 0 时在本机该端口以 Prometheus 文本格式提供 /metrics"""
         try:
-            if self.history_format == "text":
-                content, ok = await self._fetch_history_text()
-                if ok:
-                    await event.send(event.plain_result(content))
-                else:
-                    await event.send(event.plain_result(str(content)))
+            port = int(getattr(self.config, "metrics_port", 0))
+        except (TypeError, ValueError):
+            port = 0
+        if port <= 0:
+            return
+
+        async def handle(_request):
+            return web.Response(text=self._metrics.render(), content_type="text/plain", charset="utf-8")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        runner = web.AppRunner(app, access_log=None)
+        try:
+            await runner.setup()
+            await web.TCPSite(runner, "127.0.0.1", port).start()
+        except Exception as e:
+            await runner.cleanup()
+            logger.error(f"[指标] 无法监听 127.0.0.1:{port}: {e}")
+            return
+        self._metrics_runner = runner
+        logger.info(f"[指标] 已在 http://127.0.0.1:{port}/metrics 提供指标")
+
+    def _find_source(self, name: str) -> Optional[ContentSource]:
+        """按内部名称、显示名称或查询指令查找内容源"""
+        name = name.strip()
+        for source in self.sources.values():
+            if name in (source.name, source.label) or name in source.commands:
+                return source
+        return None
+
+    def _source_status(self, item: str) -> str:
+        source = self._source(item)
+        sleep_time = self._calculate_sleep_time(source.push_time)
+        h = int(sleep_time / 3600)
+        m = int((sleep_time % 3600) / 60)
+        return (
+            f"{source.label}运行中\n推送时间: {source.push_time or self.push_time}\n"
+            f"默认格式: {source.format}\n距离下次推送: {h}小时{m}分钟"
+        )
+
+    def _command_allowed(self, event: AstrMessageEvent) -> bool:
+        """按用户与群组的令牌桶判断查询指令是否放行，限额为每分钟次数，0 表示不限制"""
+        checks = [("user", str(event.get_sender_id()), "command_user_limit", 5)]
+        group_id = event.get_group_id()
+        if group_id:
+            checks.append(("group", event.unified_msg_origin, "command_group_limit", 20))
+        buckets = []
+        for scope, key, option, default in checks:
+            try:
+                per_minute = float(getattr(self.config, option, default))
+            except (TypeError, ValueError):
+                per_minute = default
+            if per_minute <= 0:
+                continue
+            bucket = self._command_buckets.get((scope, key))
+            if bucket is None or bucket.burst != max(per_minute, 1.0):
+                bucket = TokenBucket(per_minute / 60, burst=per_minute)
+                self._command_buckets[(scope, key)] = bucket
+            self._command_buckets.move_to_end((scope, key))
+            buckets.append(bucket)
+        while len(self._command_buckets) > THROTTLE_MAX_KEYS:
+            self._command_buckets.popitem(last=False)
+        # 所有桶都有令牌时才一并扣除，避免被拒绝的请求消耗其余桶的额度
+        if not all(bucket.available() for bucket in buckets):
+            return False
+        for bucket in buckets:
+            bucket.try_acquire()
+        return True
+
+    async def _reply_throttled(self, event: AstrMessageEvent, item: str):
+        """
+        被限流的查询：有缓存内容时直接回复缓存，不请求接口；否则静默丢弃。
+        缓存中没有当天内容时使用最近一次成功的内容，不是当天的内容附带旧内容提示。
+        """
+        source = self._source(item)
+        if getattr(self.config, "command_throttle_action", "cached") != "drop":
+            date = datetime.datetime.now().strftime("%Y-%m-%d")
+            content, stale = self._cache_get((item, source.kind, date)), False
+            if content is None:
+                last = self._last_good_for(item, source.kind)
+                if last is not None:
+                    content, stale = last[1], last[0] != date
+            if content is not None:
+                self._metrics.inc("commands_total", source=item, result="cached")
+                await self._send_content(event, source, content, stale)
+                return
+        self._metrics.inc("commands_total", source=item, result="dropped")
+        logger.info(f"[{item}] 查询指令被限流，已忽略: {event.get_sender_id()}@{event.unified_msg_origin}")
+
+    async def _reply_source(self, event: AstrMessageEvent, item: str):
+        """按内容源配置的格式回复查询指令，超出限流的请求不访问接口"""
+        source = self._source(item)
+        if not self._command_allowed(event):
+            await self._reply_throttled(event, item)
+            return
+        self._metrics.inc("commands_total", source=item, result="served")
+        try:
+            async with self._command_semaphore:
+                content, ok, stale = await self._serve_content(item, source.kind)
+            if not ok:
+                await event.send(event.plain_result(str(content)))
             else:
-                path, ok = await self._fetch_history_image_path()
-                if ok:
-                    await event.send(MessageChain().file_image(path))
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-                else:
-                    await event.send(event.plain_result(str(path)))
+                await self._send_content(event, source, content, stale)
         except Exception as e:
-            await event.send(event.plain_result(f"获取历史今日失败: {e}"))
-
-    async def _fetch_history_text(self) -> Tuple[str, bool]:
-        retries = 3
-        timeout = self.timeout
-        fmt = self.history_format
-        if fmt == "image":
-            fmt = "json"
-        for attempt in range(retries):
+            await event.send(event.plain_result(f"获取{source.label}失败: {e}"))
+
+    async def _send_content(self, event: AstrMessageEvent, source: ContentSource, content: str, stale: bool):
+        """回复查询到的内容，旧内容与推送一样附带提示"""
+        if source.kind == "image":
+            path = await self._image_for(content, self._image_profile(event.unified_msg_origin))
+            await event.send(self._content_chain("image", path, stale))
+        else:
+            await event.send(event.plain_result(STALE_NOTICE + content if stale else content))
+
+    async def _update_source_text(self, event: AstrMessageEvent, item: str) -> str:
+        source = self._source(item)
+        content, ok = await self._fetch_content(item, "text", refresh=True)
+        if ok:
+            return f"{event.get_sender_name()}:已拉取最新{source.label}\n{content[:50]}..."
+        return f"{event.get_sender_name()}:获取失败 {content}"
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的 HTTP 会话（懒加载），所有内容类型复用同一个连接池"""
+        if self._session is not None and not self._session.closed:
+            return self._session
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=HTTP_POOL_LIMIT,
+                    limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                    ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+                    keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                )
+                self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def _fetch_source(self, item: str, kind: str) -> str:
+        """
+        单次拉取内容源，失败时抛出异常。kind 为 text 时返回文本，为 image 时返回本地图片路径。
+        接口格式与所需形式不一致时改为请求 JSON，再从中提取文本或图片链接。
+        """
+        source = self._source(item)
+        fmt = source.format if source.format == kind else "json"
+        date = datetime.datetime.now().strftime("%Y-%m-%d")
+        url = source.request_url(fmt, self.api_key, date)
+        if kind == "image":
+            if fmt != "json":
+                return await self._get_image(url)
+            img_url = source.extract_image_url(_json_loads(await self._get_body(url)))
+            if not img_url:
+                raise Exception("JSON未找到图片URL")
+            return await self._get_image(img_url)
+        body = await self._get_body(url)
+        if fmt == "json":
+            data = _json_loads(body)
+            return source.extract_text(data, date) or str(data)
+        return body.decode("utf-8", errors="ignore")
+
+    async def _fetch_content(self, item: str, kind: str, refresh: bool = False) -> Tuple[str, bool]:
+        """
+        带当日缓存的内容获取，命令查询与定时推送共用。
+        kind 为 text 时返回文本，为 image 时返回本地图片路径；refresh 为真时跳过缓存强制拉取。
+        """
+        date = datetime.datetime.now().strftime("%Y-%m-%d")
+        key = (item, kind, date)
+        if not refresh:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached, True
+        content, ok, _ = await asyncio.shield(self._start_fetch(key, item, kind))
+        return content, ok
+
+    async def _serve_content(self, item: str, kind: str, deadline: Optional[float] = None) -> Tuple[str, bool, bool]:
+        """
+        陈旧可用(stale-while-revalidate)的内容获取，返回 (内容, 是否成功, 是否为旧内容)。
+        缓存未命中时在后台刷新：deadline 为空(查询指令)时，若有当天的最近一次成功内容则立即返回；
+        否则(定时推送)最多等待 deadline 秒，超时则返回最近一次成功的内容并标记为旧内容。
+        """
+        date = datetime.datetime.now().strftime("%Y-%m-%d")
+        key = (item, kind, date)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached, True, False
+        task = self._start_fetch(key, item, kind)
+        last = self._last_good_for(item, kind)
+        if last is not None:
+            last_date, value = last
+            if deadline is None:
+                if last_date == date:
+                    return value, True, False
+            else:
+                done, _ = await asyncio.wait({task}, timeout=deadline)
+                if not done:
+                    logger.warning(f"[{item}] {deadline:.0f} 秒内未拉取到最新内容，使用 {last_date} 的旧内容")
+                    return value, True, True
+        return await asyncio.shield(task)
+
+    def _cache_get(self, key: tuple) -> Optional[str]:
+        cached = self._cache.get(key)
+        self._metrics.inc("cache_requests_total", source=key[0], result="miss" if cached is None else "hit")
+        if cached is not None and key[1] == "image":
+            self._images.touch(cached)
+        return cached
+
+    def _start_fetch(self, key: tuple, item: str, kind: str) -> asyncio.Task:
+        """相同 (内容类型, 格式, 日期) 的并发请求共享同一次拉取"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_store(key, item, kind))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        return task
+
+    def _last_good_for(self, item: str, kind: str) -> Optional[Tuple[str, str]]:
+        """返回 (日期, 内容)：该内容类型最近一次成功拉取的结果，图片文件已被淘汰时返回 None"""
+        last = self._last_good.get((item, kind))
+        if last is None or (kind == "image" and not os.path.exists(last[1])):
+            return None
+        return last
+
+    async def _fetch_and_store(self, key: tuple, item: str, kind: str) -> Tuple[str, bool, bool]:
+        """
+        按统一的重试策略（指数退避加抖动）拉取内容，并经过该接口的熔断器。
+        熔断中或重试耗尽时，若有最近一次成功的内容则返回它并标记为旧内容。
+        """
+        breaker = self._breaker(item)
+        attempts = max(1, int(getattr(self.config, "fetch_retries", 3)))
+        error = ""
+        for attempt in range(attempts):
+            if not breaker.allow():
+                error = "接口暂时不可用（熔断中）"
+                logger.warning(f"[{item}] 接口熔断中，跳过请求")
+                break
+            started = time.monotonic()
             try:
-                url = f"{self.history_api}?format={fmt}"
-                if self.api_key:
-                    url += f"&apikey={self.api_key}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=timeout) as resp:
-                        if resp.status != 200:
-                            raise Exception(f"状态码: {resp.status}")
-                        if fmt == "json":
-                            data = await resp.json(content_type=None)
-                            txt = None
-                            def walk(v):
-                                nonlocal txt
-                                if isinstance(v, dict):
-                                    for vv in v.values():
-                                        walk(vv)
-                                elif isinstance(v, list):
-                                    for vv in v:
-                                        walk(vv)
-                                elif isinstance(v, str):
-                                    txt = txt or v
-                            walk(data)
-                            return (txt or str(data)), True
-                        else:
-                            content = await resp.read()
-                            text = content.decode("utf-8", errors="ignore")
-                            return text, True
+                content = await self._fetch_source(item, kind)
             except Exception as e:
-                logger.error(f"[history] 请求失败 {attempt + 1}/{retries}: {e}")
-                if attempt == retries - 1:
-                    return f"接口报错: {e}", False
-                await asyncio.sleep(1)
-
-    async def _fetch_history_image_path(self) -> Tuple[str, bool]:
-        retries = 3
-        timeout = self.timeout
-        fmt = self.history_format
-        if fmt == "text":
-            fmt = "json"
-        for attempt in range(retries):
+                self._record_fetch(item, attempt, "error", started)
+                breaker.record_failure()
+                error = str(e) or type(e).__name__
+                logger.error(f"[{item}] 请求失败 {attempt + 1}/{attempts}: {error}")
+                if attempt < attempts - 1:
+                    await asyncio.sleep(_backoff_delay(attempt))
+                continue
+            self._record_fetch(item, attempt, "ok", started)
+            breaker.record_success()
+            self._cache.set(key, content)
+            self._last_good[(item, kind)] = (key[2], content)
+            return content, True, False
+        last = self._last_good_for(item, kind)
+        if last is not None:
+            logger.warning(f"[{item}] 拉取失败，使用 {last[0]} 的旧内容: {error}")
+            return last[1], True, True
+        return f"接口报错，请联系管理员: {error}", False, False
+
+    def _record_fetch(self, item: str, attempt: int, result: str, started: float):
+        attempt_label = str(attempt + 1)
+        self._metrics.inc("fetch_attempts_total", source=item, attempt=attempt_label, result=result)
+        self._metrics.observe("fetch_seconds", time.monotonic() - started, source=item, attempt=attempt_label)
+
+    def _breaker(self, item: str) -> CircuitBreaker:
+        """按接口地址返回共享的熔断器，同一接口的文本与图片请求共用"""
+        api = self._source(item).api
+        breaker = self._breakers.get(api)
+        if breaker is None:
+            breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+            self._breakers[api] = breaker
+        return breaker
+
+    def _validator_headers(self, url: str) -> dict:
+        entry = self._validators.get(url)
+        headers = {}
+        if entry is not None:
+            etag, last_modified, _ = entry
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def _store_validators(self, url: str, resp: aiohttp.ClientResponse, local):
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            self._validators.pop(url, None)
+            return
+        self._validators[url] = (etag, last_modified, local)
+        self._validators.move_to_end(url)
+        while len(self._validators) > VALIDATOR_MAX_ENTRIES:
+            self._validators.popitem(last=False)
+
+    async def _get_body(self, url: str) -> bytes:
+        """
+        GET 请求并返回响应体。带上次响应的 ETag/Last-Modified 发起条件请求，
+        接口返回 304 时直接复用本地保存的响应体。
+        """
+        session = await self._get_session()
+        async with session.get(url, timeout=self.timeout, headers=self._validator_headers(url)) as resp:
+            if resp.status == 304 and url in self._validators:
+                self._validators.move_to_end(url)
+                return self._validators[url][2]
+            if resp.status != 200:
+                raise Exception(f"状态码: {resp.status}")
+            body = await resp.read()
+            self._store_validators(url, resp, body)
+            return body
+
+    async def _get_image(self, url: str) -> str:
+        """下载图片到本地缓存并返回路径，条件请求命中 304 时复用已缓存的图片文件"""
+        session = await self._get_session()
+        entry = self._validators.get(url)
+        headers = self._validator_headers(url) if entry is not None and os.path.exists(entry[2]) else {}
+        started = time.monotonic()
+        try:
+            async with session.get(url, timeout=self.timeout, headers=headers) as resp:
+                if resp.status == 304 and headers:
+                    self._images.touch(entry[2])
+                    self._record_image("not_modified", started)
+                    return entry[2]
+                if resp.status != 200:
+                    raise Exception(f"图片状态码: {resp.status}")
+                path = await self._images.put_stream(resp, self._image_max_bytes())
+                self._store_validators(url, resp, path)
+        except Exception:
+            self._record_image("error", started)
+            raise
+        self._record_image("downloaded", started)
+        self._metrics.observe("image_download_bytes", os.path.getsize(path))
+        return path
+
+    def _record_image(self, result: str, started: float):
+        self._metrics.inc("image_downloads_total", result=result)
+        self._metrics.observe("image_download_seconds", time.monotonic() - started)
+
+    def _image_profile(self, target: str) -> Optional[ImageProfile]:
+        """返回目标所在平台的图片处理配置，未配置时返回 None"""
+        if not self._image_profiles:
+            return None
+        prefix = str(target).split(":", 1)[0]
+        return self._image_profiles.get(prefix) or self._image_profiles.get("*")
+
+    def _group_by_profile(self, targets: list) -> dict:
+        groups: dict = {}
+        for target in targets:
+            groups.setdefault(self._image_profile(target), []).append(target)
+        return groups
+
+    async def _image_for(self, path: str, profile: Optional[ImageProfile]) -> str:
+        """
+        返回按平台配置处理后的图片路径。处理在进程池中进行，结果按 (内容哈希, 配置) 缓存在图片缓存目录，
+        同一张图片对同一配置只处理一次；处理失败时退回原图。
+        """
+        if profile is None or Image is None:
+            return path
+        key = (path, profile.key)
+        done = self._processed.get(key)
+        if done is None:
+            # 重启后内存记录为空，已处理过的图片直接从缓存目录复用
+            done = f"{os.path.splitext(path)[0]}.{profile.key}.jpeg"
+        if os.path.exists(done):
+            self._images.touch(done)
+            return done
+        task = self._processing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._process_in_pool(path, profile))
+            self._processing[key] = task
+            task.add_done_callback(lambda _t, k=key: self._processing.pop(k, None))
+        try:
+            return await asyncio.shield(task)
+        except Exception as e:
+            logger.warning(f"[图片处理] 处理失败，使用原图: {e}")
+            # 记录失败结果，同一张图片不再重复处理
+            self._remember_processed(key, path)
+            return path
+
+    def _remember_processed(self, key: tuple, result: str):
+        self._processed[key] = result
+        self._processed.move_to_end(key)
+        while len(self._processed) > PROCESSED_MAX_ENTRIES:
+            self._processed.popitem(last=False)
+
+    async def _process_in_pool(self, path: str, profile: ImageProfile) -> str:
+        if self._image_pool is None:
+            workers = max(1, int(getattr(self.config, "image_workers", 2)))
+            self._image_pool = ProcessPoolExecutor(max_workers=workers)
+        stem, _ = os.path.splitext(path)
+        dst = f"{stem}.{profile.key}.jpeg"
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._image_pool, _process_image, path, dst, profile.max_width, profile.max_kb)
+        self._remember_processed((path, profile.key), result)
+        if result != path:
+            await asyncio.to_thread(self._images.enforce_cap, result)
+            logger.info(
+                f"[图片处理] {os.path.basename(path)} -> {profile.key}: "
+                f"{os.path.getsize(path) // 1024}KB -> {os.path.getsize(result) // 1024}KB，耗时 {time.monotonic() - started:.2f}s"
+            )
+        return result
+
+    def _stale_deadline(self) -> float:
+        try:
+            return max(0.0, float(getattr(self.config, "stale_deadline", 30)))
+        except (TypeError, ValueError):
+            return 30.0
+
+    def _content_chain(self, kind: str, content: str, stale: bool = False) -> MessageChain:
+        """构造推送消息，旧内容会附带提示"""
+        chain = MessageChain()
+        if stale:
+            chain.message(STALE_NOTICE)
+        if kind == "image":
+            return chain.file_image(content)
+        return chain.message(content)
+
+    def _image_max_bytes(self) -> int:
+        return int(float(getattr(self.config, "image_max_mb", 20)) * 1024 * 1024)
+
+    def _rate_limiter(self, target: str) -> TokenBucket:
+        """按群组标识符前缀（平台）返回共享的令牌桶"""
+        prefix = target.split(":", 1)[0]
+        bucket = self._rate_limiters.get(prefix)
+        if bucket is None:
+            rate = float(getattr(self.config, "send_rate", 1.0))
+            for rule in getattr(self.config, "send_rate_overrides", []) or []:
+                name, _, value = str(rule).partition("=")
+                if name.strip() == prefix:
+                    try:
+                        rate = float(value)
+                    except ValueError:
+                        logger.warning(f"[推送] 忽略无效的限速配置: {rule}")
+            bucket = TokenBucket(rate, burst=rate)
+            self._rate_limiters[prefix] = bucket
+        return bucket
+
+    async def _deliver(self, item: str, make_chain, targets=None, slot: str = "", claimed: bool = False) -> Tuple[list, dict]:
+        """
+        并发向目标群组发送消息：全局并发数受 send_concurrency 限制，
+        同一平台前缀的发送速率受令牌桶限制。
+        每个目标独立成功或失败，失败的目标按指数退避重试 send_retries 轮，
+        结束后输出一条汇总日志。返回 (成功目标列表, {失败目标: 错误信息})。
+        slot 为本次推送对应的时间点，推送台账中该时间点已送达的目标会被跳过。
+        claimed 为 True 时调用方已在分片协调中认领目标并自行记录送达（合并推送按各项内容认领）。
+        """
+        targets = list(self.config.groups if targets is None else targets)
+        date = datetime.date.today().strftime("%Y-%m-%d")
+        slot = slot or self._current_slot(item)
+        shards = None if claimed else self._shards
+        if shards is not None:
+            targets = await self._claim_targets(shards, item, date, slot, targets)
+            if isinstance(targets, dict):
+                return [], targets
+            if not targets:
+                return [], {}
+        ledger = self._ledger
+        if ledger is not None:
+            done = ledger.done_targets(item, date, slot)
+            if done:
+                logger.info(f"[{item}] {slot} 已有 {len(done)} 个目标送达，跳过")
+                targets = [t for t in targets if t not in done]
+            if not targets:
+                return [], {}
+            ledger.plan(item, date, slot, targets)
+        retries = max(0, int(getattr(self.config, "send_retries", 2)))
+        succeeded: list = []
+        failed: dict = {}
+
+        async def send_one(target: str):
+            # 先取令牌再占并发槽，避免慢平台的排队占满并发
+            await self._rate_limiter(target).acquire()
+            platform = target.split(":", 1)[0]
+            async with self._send_semaphore:
+                started = time.monotonic()
+                try:
+                    ok = await self.context.send_message(target, make_chain())
+                except Exception as e:
+                    self._record_send(platform, "error", started)
+                    failed[target] = str(e) or type(e).__name__
+                    return
+            self._record_send(platform, "not_found" if ok is False else "ok", started)
+            if ok is False:
+                failed[target] = "未找到对应平台或会话"
+            else:
+                failed.pop(target, None)
+                succeeded.append(target)
+                if ledger is not None:
+                    ledger.mark(item, date, slot, target, "done")
+
+        pending = targets
+        for attempt in range(retries + 1):
+            if attempt:
+                delay = SEND_RETRY_BASE_DELAY * 2 ** (attempt - 1)
+                logger.info(f"[{item}] {len(pending)} 个目标发送失败，{delay} 秒后第 {attempt} 次重试")
+                await asyncio.sleep(delay)
+            await asyncio.gather(*(send_one(t) for t in pending))
+            pending = [t for t in pending if t in failed]
+            if not pending:
+                break
+
+        if ledger is not None:
+            for target in failed:
+                ledger.mark(item, date, slot, target, "failed")
+        if shards is not None and succeeded:
+            try:
+                await asyncio.to_thread(shards.complete, item, date, slot, succeeded)
+            except sqlite3.Error as e:
+                # 认领仍属于本实例，本实例存活期间不会被其他分片重复发送
+                logger.warning(f"[分片] 记录送达状态失败: {e}")
+        summary = f"[{item}] 推送完成: 成功 {len(succeeded)}/{len(targets)}"
+        if failed:
+            detail = "; ".join(f"{t}: {err}" for t, err in failed.items())
+            logger.warning(f"{summary}，失败 {len(failed)}: {detail}")
+        else:
+            logger.info(summary)
+        return succeeded, failed
+
+    async def _claim_targets(self, shards: ShardCoordinator, item: str, date: str, slot: str, targets: list):
+        """
+        在线程中筛选并认领本实例负责的目标；协调文件被其他实例长时间锁住时退避重试，
+        仍失败则返回 {目标: 错误信息}，由调用方计为发送失败。
+        """
+        owned = targets
+        for attempt in range(SHARD_CLAIM_RETRIES):
+            try:
+                owned = await asyncio.to_thread(shards.owned, targets)
+                return await asyncio.to_thread(shards.claim, item, date, slot, owned)
+            except sqlite3.OperationalError as e:
+                error = str(e)
+                if attempt + 1 < SHARD_CLAIM_RETRIES:
+                    await asyncio.sleep(_backoff_delay(attempt))
+        logger.error(f"[{item}] {slot} 认领分片目标失败: {error}")
+        return {t: f"分片认领失败: {error}" for t in owned}
+
+    def _record_send(self, platform: str, result: str, started: float):
+        self._metrics.inc("send_total", platform=platform, result=result)
+        self._metrics.observe("send_seconds", time.monotonic() - started, platform=platform)
+
+    def _parse_push_times(self, push_time: str = "") -> list:
+        """解析推送时间字符串为 [(时, 分)]，push_time 为空则使用全局 push_time，无有效值时默认 08:00"""
+        time_str = (push_time or self.push_time).replace("，", ",")
+        times = []
+        for t_str in time_str.split(","):
+            parts = t_str.strip().split(":")
+            if len(parts) != 2:
+                continue
+            try:
+                h, m = map(int, parts)
+                datetime.time(h, m)
+            except ValueError:
+                continue
+            times.append((h, m))
+        return sorted(set(times)) or [(8, 0)]
+
+    def _calculate_sleep_time(self, push_time: str = "") -> float:
+        """计算距离下次推送的秒数，push_time 为空则使用全局 push_time"""
+        now = datetime.datetime.now()
+        candidates = []
+        for h, m in self._parse_push_times(push_time):
+            target = now.replace(hour=h, minute=m, second=0, microsecond=0)
+            if target <= now:
+                target += datetime.timedelta(days=1)
+            candidates.append(target)
+        return (min(candidates) - now).total_seconds()
+
+    def _current_slot(self, item: str) -> str:
+        """返回今天最近一个已到达的推送时间点(HH:MM)，手动推送据此与定时推送去重"""
+        now = datetime.datetime.now()
+        passed = [(h, m) for h, m in self._plan_times(item) if (h, m) <= (now.hour, now.minute)]
+        if not passed:
+            return "manual"
+        h, m = passed[-1]
+        return f"{h:02d}:{m:02d}"
+
+    async def _manual_push(self, event: AstrMessageEvent, item: str) -> str:
+        """手动推送并返回给管理员的结果说明，包含成功、失败与因已送达而跳过的目标数"""
+        label = self._source(item).label
+        sent, failed, skipped = await self._push_source(item)
+        if not (sent or failed or skipped):
+            return f"{event.get_sender_name()}: 没有订阅{label}的群组"
+        text = f"{event.get_sender_name()}: 已向 {sent} 个群组推送{label}"
+        if failed:
+            text += f"，失败 {failed} 个"
+        if skipped:
+            slot = self._current_slot(item)
+            where = "今天的手动推送" if slot == "manual" else f"{slot} 的推送"
+            text += f"，跳过 {skipped} 个（{where}已送达或由其他分片负责）"
+        return text
+
+    async def _push_source(self, item: str, slot: str = "") -> Tuple[int, int, int]:
+        """
+        向订阅了该内容的目标推送：按订阅矩阵把目标按格式分组，每种格式只拉取一次，
+        各格式并发发送。slot 为空时（手动推送）发送给全部订阅目标。
+        返回 (成功数, 失败数, 跳过数)，跳过的目标为台账中已送达或不属于本分片的目标。
+        """
+        variants = self._slot_variants(item, slot)
+        if not variants:
+            logger.info(f"[{item}] 没有订阅该内容的目标，跳过推送")
+            return 0, 0, 0
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(self._push_variant(item, kind, targets, slot) for kind, targets in variants.items())
+        )
+        outcomes = [r[0] for r in results]
+        for result in ("error", "partial", "stale", "ok"):
+            if result in outcomes:
+                break
+        self._metrics.inc("push_runs_total", source=item, result=result)
+        self._metrics.observe("push_run_seconds", time.monotonic() - started, source=item)
+        return tuple(sum(r[i] for r in results) for i in (1, 2, 3))
+
+    async def _push_variant(self, item: str, kind: str, targets: list, slot: str) -> Tuple[str, int, int, int]:
+        """
+        拉取一种格式的内容并发送给对应目标，返回 (结果 ok/stale/partial/error, 成功数, 失败数, 跳过数)。
+        图片按目标平台的处理配置分组，每种配置只处理一次。
+        """
+        try:
+            content, ok, stale = await self._serve_content(item, kind, deadline=self._stale_deadline())
+            if not ok:
+                raise Exception(str(content))
+            if kind != "image":
+                results = [await self._deliver(item, lambda: self._content_chain(kind, content, stale), targets=targets, slot=slot)]
+            else:
+
+                async def deliver_profile(profile, group):
+                    path = await self._image_for(content, profile)
+                    return await self._deliver(item, lambda: self._content_chain(kind, path, stale), targets=group, slot=slot)
+
+                results = await asyncio.gather(
+                    *(deliver_profile(profile, group) for profile, group in self._group_by_profile(targets).items())
+                )
+        except Exception as e:
+            logger.error(f"[{item}] 推送失败({kind}): {e}")
+            return "error", 0, len(targets), 0
+        sent = sum(len(s) for s, _ in results)
+        failed = sum(len(f) for _, f in results)
+        outcome = "partial" if failed else ("stale" if stale else "ok")
+        return outcome, sent, failed, len(targets) - sent - failed
+
+    async def _catch_up_missed(self):
+        """
+        启动时补发宽限期内错过的推送：台账中没有记录或仍有未送达目标的时间点会重新推送，
+        已送达的目标由台账跳过。
+        """
+        if self._ledger is None:
+            return
+        try:
+            grace = float(getattr(self.config, "catchup_grace", 30)) * 60
+        except (TypeError, ValueError):
+            grace = 0
+        if grace <= 0:
+            return
+        now = datetime.datetime.now()
+        date = now.strftime("%Y-%m-%d")
+        for item, source in self.sources.items():
+            if not source.enabled or now.weekday() in source.skip_weekdays:
+                continue
+            for h, m in self._plan_times(item):
+                fire = now.replace(hour=h, minute=m, second=0, microsecond=0)
+                if fire > now or (now - fire).total_seconds() > grace:
+                    continue
+                slot = f"{h:02d}:{m:02d}"
+                targets = {t for ts in self._slot_variants(item, slot).values() for t in ts}
+                if targets <= self._ledger.done_targets(item, date, slot):
+                    continue
+                logger.info(f"[{item}] 补发错过的 {slot} 推送")
+                try:
+                    await self._push_source(item, slot)
+                except Exception as e:
+                    logger.error(f"[{item}] 补发失败: {e}")
+
+    def _prefetch_lead_seconds(self) -> float:
+        try:
+            return max(0.0, float(getattr(self.config, "prefetch_lead", 5)) * 60)
+        except (TypeError, ValueError):
+            return 0.0
+
+    async def _prefetch_item(self, item: str, until_fire: float, slot: str = ""):
+        """
+        在推送时间之前预先拉取并校验内容（图片格式会下载到本地），
+        到点后推送直接命中缓存，不再把接口延迟与重试计入推送时间。
+        """
+        source = self._source(item)
+        if not source.enabled:
+            return
+        fire_time = datetime.datetime.now() + datetime.timedelta(seconds=until_fire)
+        if fire_time.date() != datetime.date.today():
+            # 跨零点的推送按当天日期缓存，提前拉取会拿到前一天的内容
+            return
+        if fire_time.weekday() in source.skip_weekdays:
+            return
+        for kind in self._slot_variants(item, slot):
+            content, ok = await self._fetch_content(item, kind, refresh=True)
+            if ok:
+                logger.info(f"[{item}] 已预拉取推送内容({kind})，{until_fire:.0f} 秒后推送")
+            else:
+                logger.warning(f"[{item}] 预拉取失败({kind})，推送时将重新拉取: {content}")
+
+    def _next_fire(self, h: int, m: int, after: datetime.datetime) -> datetime.datetime:
+        """返回 after 之后最近一次本地时间 h:m，按日期重新计算以适应夏令时切换"""
+        fire = after.replace(hour=h, minute=m, second=0, microsecond=0)
+        if fire <= after:
+            fire = (fire + datetime.timedelta(days=1)).replace(hour=h, minute=m)
+        return fire
+
+    def _build_schedule(self) -> list:
+        """
+        编译所有内容类型的推送时间点为堆：元素为 (墙钟时间戳, 序号, 类型, 内容类型, 时, 分)，
+        类型为 prefetch(预拉取) 或 fire(推送)。
+        """
+        now = datetime.datetime.now()
+        lead = self._prefetch_lead_seconds()
+        heap: list = []
+        for item in self.sources:
+            for h, m in self._plan_times(item):
+                self._schedule_job(heap, item, h, m, self._next_fire(h, m, now), lead)
+        if heap:
+            first = datetime.datetime.fromtimestamp(min(e[0] for e in heap if e[2] == "fire"))
+            logger.info(f"[调度器] 已加载 {sum(1 for e in heap if e[2] == 'fire')} 个推送时间点，最近一次: {first:%Y-%m-%d %H:%M}")
+        return heap
+
+    def _reschedule(self, heap: list, items: set) -> list:
+        """
+        只重建指定内容类型的调度条目：时间点未变的推送条目原样保留（避免临近推送时重建导致错过），
+        删除已取消的时间点，补充新增的时间点，并按当前提前量重排预拉取。
+        """
+        times = {item: set(self._plan_times(item)) if item in self.sources else set() for item in items}
+        kept = [e for e in heap if e[3] not in items or (e[2] == "fire" and (e[4], e[5]) in times[e[3]])]
+        heap = kept
+        heapq.heapify(heap)
+        now = datetime.datetime.now()
+        lead = self._prefetch_lead_seconds()
+        for fire_ts, _, _, item, h, m in [e for e in kept if e[3] in items]:
+            times[item].discard((h, m))
+            if lead > 0 and fire_ts - lead > time.time():
+                self._job_seq += 1
+                heapq.heappush(heap, (fire_ts - lead, self._job_seq, "prefetch", item, h, m))
+        for item, new_times in times.items():
+            for h, m in new_times:
+                self._schedule_job(heap, item, h, m, self._next_fire(h, m, now), lead)
+        logger.info(f"[调度器] 已重建 {', '.join(sorted(items))} 的推送时间点，共 {sum(1 for e in heap if e[2] == 'fire')} 个")
+        return heap
+
+    async def _wait_schedule_change(self, timeout: float):
+        """睡眠至多 timeout 秒，配置变更需要重建调度时提前醒来"""
+        try:
+            await asyncio.wait_for(self._schedule_changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._schedule_changed.clear()
+
+    def _schedule_job(self, heap: list, item: str, h: int, m: int, fire: datetime.datetime, lead: float):
+        self._job_seq += 1
+        fire_ts = fire.timestamp()
+        heapq.heappush(heap, (fire_ts, self._job_seq, "fire", item, h, m))
+        if lead > 0 and fire_ts - lead > time.time():
+            self._job_seq += 1
+            heapq.heappush(heap, (fire_ts - lead, self._job_seq, "prefetch", item, h, m))
+
+    async def _scheduler_loop(self):
+        """
+        统一调度器：单个任务按堆顶最早的时间点依次触发预拉取与推送。
+        睡眠按单调时钟分段进行，每次醒来重新对照墙钟时间，
+        以适应系统时间跳变与长时间挂起；超过宽限期才被处理的推送视为错过并跳过。
+        """
+        heap = self._build_schedule()
+        while True:
             try:
-                url = f"{self.history_api}?format={fmt}"
-                if self.api_key:
-                    url += f"&apikey={self.api_key}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=timeout) as resp:
-                        if resp.status != 200:
-                            raise Exception(f"状态码: {resp.status}")
-                        if fmt == "json":
-                            data = await resp.json(content_type=None)
-                            img_url = None
-                            def walk(v):
-                                nonlocal img_url
-                                if isinstance(v, dict):
-                                    for vv in v.values():
-                                        walk(vv)
-                                elif isinstance(v, list):
-                                    for vv in v:
-                                        walk(vv)
-                                elif isinstance(v, str):
-                                    if v.startswith("http") and (".jpg" in v or ".jpeg" in v or ".png" in v):
-                                        img_url = img_url or v
-                            walk(data)
-                            if not img_url:
-                                raise Exception("JSON未找到图片URL")
-                            async with session.get(img_url, timeout=timeout) as ir:
-                                if ir.status != 200:
-                                    raise Exception(f"图片状态码: {ir.status}")
-                                b = await ir.read()
-                                f = tempfile.NamedTemporaryFile(delete=False, suffix=".jpeg")
-                                try:
-                                    f.write(b)
-                                    f.flush()
-                                    return f.name, True
-                                finally:
-                                    f.close()
+                if self._dirty_items:
+                    items, self._dirty_items = self._dirty_items, set()
+                    heap = self._reschedule(heap, items)
+                if not heap:
+                    await self._wait_schedule_change(SCHEDULER_MAX_SLEEP)
+                    if not self._dirty_items:
+                        heap = self._build_schedule()
+                    continue
+                fire_ts, _, kind, item, h, m = heap[0]
+                delay = fire_ts - time.time()
+                if delay > 0:
+                    await self._wait_schedule_change(min(delay, SCHEDULER_MAX_SLEEP))
+                    continue
+                heapq.heappop(heap)
+                slot = f"{h:02d}:{m:02d}"
+                lateness = -delay
+                if kind == "prefetch":
+                    until_fire = fire_ts + self._prefetch_lead_seconds() - time.time()
+                    if until_fire > 0:
+                        self._spawn(self._prefetch_item(item, until_fire, slot))
+                    continue
+                fire = datetime.datetime.fromtimestamp(fire_ts)
+                items = [item]
+                if getattr(self.config, "digest_mode", False):
+                    # 合并推送：同一时刻到点的其余内容一并取出；同一时刻的预拉取条目可能排在它们之间，放回堆中
+                    others = []
+                    while heap and heap[0][0] == fire_ts:
+                        entry = heapq.heappop(heap)
+                        if entry[2] == "fire":
+                            items.append(entry[3])
                         else:
-                            b = await resp.read()
-                            f = tempfile.NamedTemporaryFile(delete=False, suffix=".jpeg")
-                            try:
-                                f.write(b)
-                                f.flush()
-                                return f.name, True
-                            finally:
-                                f.close()
+                            others.append(entry)
+                    for entry in others:
+                        heapq.heappush(heap, entry)
+                for it in items:
+                    self._schedule_job(heap, it, h, m, self._next_fire(h, m, fire), self._prefetch_lead_seconds())
+                label = "+".join(items)
+                if lateness > self._misfire_grace_seconds():
+                    logger.warning(f"[{label}] {slot} 推送已错过 {lateness / 60:.1f} 分钟，跳过本次")
+                    continue
+                if lateness > 60:
+                    logger.warning(f"[{label}] {slot} 推送延迟 {lateness:.0f} 秒触发")
+                if len(items) > 1:
+                    self._spawn(self._run_digest(items, slot))
+                else:
+                    self._spawn(self._run_scheduled(item, slot))
             except Exception as e:
-                logger.error(f"[history] 请求失败 {attempt + 1}/{retries}: {e}")
-                if attempt == retries - 1:
-                    return f"接口报错: {e}", False
-                await asyncio.sleep(1)
+                logger.error(f"[调度器] 出错: {e}")
+                traceback.print_exc()
+                await asyncio.sleep(SCHEDULER_MAX_SLEEP)
 
-    async def _send_history_to_groups(self):
+    async def _shard_heartbeat_loop(self):
+        """定期登记心跳；有分片下线时，其目标重新分配给存活分片，并在宽限期内补发错过的推送"""
+        shards = self._shards
+        keep_from = datetime.date.today() - datetime.timedelta(days=LEDGER_KEEP_DAYS)
         try:
-            if self.history_format == "text":
-                content, ok = await self._fetch_history_text()
-                if not ok:
-                    raise Exception(str(content))
-                for target in self.config.groups:
-                    mc = MessageChain().message(content)
-                    await self.context.send_message(target, mc)
-                    await asyncio.sleep(2)
+            await asyncio.to_thread(shards.purge, keep_from.strftime("%Y-%m-%d"))
+        except Exception as e:
+            logger.warning(f"[分片] 清理旧认领失败: {e}")
+        # 协调文件可能暂时被锁住，任何一次读写失败都只跳过本轮，心跳任务不能退出
+        live: Optional[frozenset] = None
+        while True:
+            try:
+                await asyncio.to_thread(shards.heartbeat)
+                current = await asyncio.to_thread(shards.live_shards)
+            except Exception as e:
+                logger.error(f"[分片] 心跳失败: {e}")
             else:
-                path, ok = await self._fetch_history_image_path()
-                if not ok:
-                    raise Exception(str(path))
-                for target in self.config.groups:
-                    mc = MessageChain().file_image(path)
-                    await self.context.send_message(target, mc)
-                    await asyncio.sleep(2)
-                try:
-                    os.remove(path)
-                except Exception:
-                    pass
+                if live is not None and current != live:
+                    logger.info(f"[分片] 存活分片变化: {sorted(live)} -> {sorted(current)}")
+                    if live - current:
+                        self._spawn(self._catch_up_missed())
+                live = current
+            await asyncio.sleep(SHARD_HEARTBEAT_INTERVAL)
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._push_tasks.add(task)
+        task.add_done_callback(self._push_tasks.discard)
+        return task
+
+    def _misfire_grace_seconds(self) -> float:
+        try:
+            return max(60.0, float(getattr(self.config, "catchup_grace", 30)) * 60)
+        except (TypeError, ValueError):
+            return 60.0
+
+    async def _run_scheduled(self, item: str, slot: str):
+        """定时推送单个内容类型"""
+        source = self.sources.get(item)
+        if source is None or not source.enabled:
+            return
+        if datetime.datetime.now().weekday() in source.skip_weekdays:
+            logger.info(f"[{source.label}] 今日不推送")
+            return
+        try:
+            await self._push_source(item, slot)
+        except Exception as e:
+            logger.error(f"[{item}] 定时任务出错: {e}")
+            traceback.print_exc()
+
+    async def _run_digest(self, items: list, slot: str):
+        """
+        合并推送：同一时间点到点的多项内容并发拉取，按目标订阅的组合拼成一条消息发送，
+        每个目标只调用一次 send_message。送达后为其中每项内容记录台账。
+        """
+        weekday = datetime.datetime.now().weekday()
+        items = [i for i in items if i in self.sources and self.sources[i].enabled and weekday not in self.sources[i].skip_weekdays]
+        if len(items) <= 1:
+            for item in items:
+                await self._run_scheduled(item, slot)
+            return
+        started = time.monotonic()
+        try:
+            result = await self._push_digest(items, slot)
         except Exception as e:
-            logger.error(f"[history] 推送失败: {e}")
+            logger.error(f"[{'+'.join(items)}] 合并推送出错: {e}")
+            traceback.print_exc()
+            result = "error"
+        self._metrics.inc("push_runs_total", source="digest", result=result)
+        self._metrics.observe("push_run_seconds", time.monotonic() - started, source="digest")
+
+    async def _push_digest(self, items: list, slot: str) -> str:
+        """执行一次合并推送，返回结果 ok/partial/error"""
+        date = datetime.date.today().strftime("%Y-%m-%d")
+        shards = self._shards
+        claim_failed = False
+        # 每个目标需要的 (内容, 格式)：跳过台账中已送达的内容；
+        # 分片模式下按实际内容名称认领，其他分片补发单项内容时据此跳过本实例负责或已送达的目标
+        wanted: dict = {}
+        for item in items:
+            done = self._ledger.done_targets(item, date, slot) if self._ledger is not None else set()
+            variants = self._slot_variants(item, slot)
+            pending = list(dict.fromkeys(t for targets in variants.values() for t in targets if t not in done))
+            if shards is not None and pending:
+                claimed = await self._claim_targets(shards, item, date, slot, pending)
+                if isinstance(claimed, dict):
+                    claim_failed = True
+                    claimed = []
+                pending = claimed
+            mine = set(pending)
+            for kind, targets in variants.items():
+                for target in targets:
+                    if target in mine:
+                        wanted.setdefault(target, []).append((item, kind))
+        variants = list(dict.fromkeys(v for parts in wanted.values() for v in parts))
+        if not variants:
+            return "partial" if claim_failed else "ok"
+        results = await asyncio.gather(
+            *(self._serve_content(item, kind, deadline=self._stale_deadline()) for item, kind in variants),
+            return_exceptions=True,
+        )
+        contents: dict = {}
+        for (item, kind), result in zip(variants, results):
+            if isinstance(result, Exception) or not result[1]:
+                logger.error(f"[{item}] 合并推送获取内容失败({kind}): {result if isinstance(result, Exception) else result[0]}")
+            else:
+                contents[(item, kind)] = result
+        # 订阅组合与图片处理配置都相同的目标共用一条消息
+        groups: dict = {}
+        for target, parts in wanted.items():
+            parts = tuple(p for p in parts if p in contents)
+            if parts:
+                groups.setdefault((parts, self._image_profile(target)), []).append(target)
+
+        async def deliver_group(parts: tuple, profile: Optional[ImageProfile], targets: list) -> int:
+            key = "digest:" + "+".join(item for item, _ in parts)
+            images = {}
+            for item, kind in parts:
+                if kind == "image":
+                    images[item] = await self._image_for(contents[(item, kind)][0], profile)
+            succeeded, failed = await self._deliver(
+                key, lambda: self._digest_chain(parts, contents, images), targets=targets, slot=slot, claimed=True
+            )
+            if succeeded:
+                for item, _ in parts:
+                    if self._ledger is not None:
+                        self._ledger.mark_many(item, date, slot, succeeded, "done")
+                    if shards is not None:
+                        try:
+                            await asyncio.to_thread(shards.complete, item, date, slot, succeeded)
+                        except sqlite3.Error as e:
+                            logger.warning(f"[分片] 记录送达状态失败: {e}")
+            return len(failed)
+
+        # 各组并发发送，某组的重试退避不影响其他组
+        failed_total = sum(
+            await asyncio.gather(*(deliver_group(parts, profile, targets) for (parts, profile), targets in groups.items()))
+        )
+        if not contents:
+            return "error"
+        return "partial" if failed_total or claim_failed or len(contents) < len(variants) else "ok"
+
+    def _digest_chain(self, parts: tuple, contents: dict, images: Optional[dict] = None) -> MessageChain:
+        """按内容源顺序拼接合并推送的消息，文本内容带标题，旧内容附带提示；images 为处理后的图片路径"""
+        chain = MessageChain()
+        for item, kind in sorted(parts, key=lambda p: list(self.sources).index(p[0])):
+            content, _, stale = contents[(item, kind)]
+            header = f"【{self._source(item).label}】" + ("（非最新）" if stale else "")
+            if kind == "image":
+                chain.message(header + "\n")
+                chain.file_image((images or {}).get(item, content))
+            else:
+                chain.message(f"{header}\n{content}\n")
+        return chain
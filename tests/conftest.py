@@ -0,0 +1,32 @@
+import os
+import sys
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_plugin():
+    """
+    构建只含配置、内容源与订阅矩阵的插件实例，不启动后台任务，
+    用于测试调度与限流等不依赖网络的方法。
+    """
+    pytest.importorskip("astrbot")
+    import main
+
+    def build(**config):
+        config.setdefault("groups", ["aiocqhttp:GroupMessage:1"])
+        config.setdefault("push_time", "08:00")
+        plugin = main.Daily60sNewsPlugin.__new__(main.Daily60sNewsPlugin)
+        plugin.config = SimpleNamespace(**config)
+        plugin.push_time = plugin.config.push_time
+        plugin._job_seq = 0
+        plugin._command_buckets = OrderedDict()
+        plugin.sources = plugin._build_sources()
+        plugin._plan = plugin._build_plan()
+        return plugin
+
+    return build
@@ -0,0 +1,143 @@
+"""
+内容提取的单元测试：JsonPath、有界遍历与 ContentSource 的文本/图片提取。
+接口响应按 bench/json_decode.py 中各接口的结构构造。
+
+需要在装有 AstrBot 的环境中运行（插件模块依赖 astrbot 包），在插件目录下执行:
+    python -m pytest tests
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("astrbot")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from main import ContentSource, JsonPath  # noqa: E402
+
+
+def wrap(data):
+    return {"code": 200, "msg": "success", "data": data}
+
+
+GOLD = wrap({
+    "date": "2026-10-18",
+    "list": [{"name": f"品牌{i}", "price": 600 + i, "unit": "元/克", "change": "+1.2"} for i in range(3)],
+    "image": "https://example.com/jinjia.png",
+})
+AI = wrap({
+    "date": "2026-10-18",
+    "list": [{"title": f"AI资讯标题{i}", "summary": "摘要", "url": f"https://example.com/a/{i}"} for i in range(2)],
+    "image": "https://example.com/ai.png",
+})
+HISTORY = wrap({
+    "date": "10-18",
+    "list": [{"year": 1000 + i * 5, "title": f"历史事件{i}", "desc": "描述"} for i in range(2)],
+    "image": "https://example.com/history.png",
+})
+MOYU = wrap({"date": "2026-10-18", "image": "https://example.com/moyu.png", "text": "摸鱼办提醒您"})
+NEWS = wrap({
+    "date": "2026-10-18",
+    "news": ["第一条", "第二条"],
+    "tip": "提示语",
+    "image": "https://example.com/60s/2026-10-18.png",
+})
+
+
+@pytest.fixture(scope="module")
+def sources():
+    # 只构建内容源注册表，不启动插件的后台任务；未配置的项取默认值
+    plugin = main.Daily60sNewsPlugin.__new__(main.Daily60sNewsPlugin)
+    plugin.config = SimpleNamespace()
+    return plugin._build_sources()
+
+
+class TestJsonPath:
+    def test_keys_and_indexes(self):
+        data = {"data": {"list": [{"title": "a"}, {"title": "b"}]}}
+        assert list(JsonPath("data.list[1].title").iter_values(data)) == ["b"]
+        assert list(JsonPath("data.list[-1].title").iter_values(data)) == ["b"]
+
+    def test_wildcard_keeps_document_order(self):
+        data = {"data": {"list": [{"title": "a"}, {"title": "b"}, {"title": "c"}]}}
+        assert list(JsonPath("data.list[*].title").iter_values(data)) == ["a", "b", "c"]
+        assert list(JsonPath("data.*").iter_values({"data": {"x": 1, "y": 2}})) == [1, 2]
+
+    def test_missing_and_mismatched_steps_yield_nothing(self):
+        data = {"data": {"list": "not a list"}}
+        assert list(JsonPath("data.list[0]").iter_values(data)) == []
+        assert list(JsonPath("data.missing.key").iter_values(data)) == []
+        assert list(JsonPath("data.list[5]").iter_values({"data": {"list": [1]}})) == []
+
+    @pytest.mark.parametrize("expr", ["data..x", "data.list[x]", "data.list[0", "data.list[0]x"])
+    def test_invalid_expressions(self, expr):
+        with pytest.raises(ValueError):
+            JsonPath(expr)
+
+
+class TestWalk:
+    def test_skips_status_fields(self):
+        assert list(main._walk_values({"code": 200, "msg": "success", "data": {"a": "x"}})) == ["x"]
+
+    def test_is_bounded(self):
+        deep = [["s"] * 10 for _ in range(main.WALK_MAX_NODES)]
+        assert len(list(main._walk_values(deep))) < main.WALK_MAX_NODES
+
+    def test_first_text_skips_dates_and_links(self):
+        assert main._walk_first_text(GOLD) == "品牌0"
+        assert main._walk_first_text(MOYU) == "摸鱼办提醒您"
+
+    def test_first_image_url(self):
+        assert main._walk_first_image_url(GOLD) == "https://example.com/jinjia.png"
+        assert main._walk_first_image_url({"data": {"x": "https://example.com/a.txt"}}) is None
+
+
+class TestBuiltinSources:
+    def test_news(self, sources):
+        text = sources["news"].extract_text(NEWS, "2026-10-18")
+        assert text.splitlines() == ["2026-10-18 每日60秒新闻", "• 第一条", "• 第二条", "提示：提示语"]
+        assert sources["news"].extract_image_url(NEWS) == "https://example.com/60s/2026-10-18.png"
+
+    def test_gold(self, sources):
+        text = sources["gold"].extract_text(GOLD, "2026-10-18")
+        assert text.splitlines()[:2] == ["2026-10-18 今日金价", "• 品牌0 600 元/克 +1.2"]
+        assert len(text.splitlines()) == 4
+
+    def test_ai(self, sources):
+        text = sources["ai"].extract_text(AI, "2026-10-18")
+        assert text.splitlines() == ["2026-10-18 AI资讯", "• AI资讯标题0 摘要", "• AI资讯标题1 摘要"]
+
+    def test_history(self, sources):
+        text = sources["history"].extract_text(HISTORY, "2026-10-18")
+        assert text.splitlines() == ["10-18 历史上的今天", "• 1000 历史事件0", "• 1005 历史事件1"]
+
+    def test_moyu(self, sources):
+        assert sources["moyu"].extract_text(MOYU, "2026-10-18") == "摸鱼办提醒您"
+
+    @pytest.mark.parametrize("payload", [NEWS, GOLD, AI, HISTORY, MOYU])
+    def test_text_never_returns_bare_date(self, sources, payload):
+        for source in sources.values():
+            assert source.extract_text(payload, "2026-10-18") not in ("2026-10-18", "10-18")
+
+    def test_images(self, sources):
+        assert sources["gold"].extract_image_url(GOLD) == "https://example.com/jinjia.png"
+        assert sources["history"].extract_image_url(HISTORY) == "https://example.com/history.png"
+
+
+class TestCustomSource:
+    def test_default_paths_render_object_lists(self):
+        source = ContentSource(name="x", label="x", api="http://a")
+        assert source.extract_text(AI, "") == "AI资讯标题0 摘要\nAI资讯标题1 摘要"
+
+    def test_configured_paths(self):
+        source = main._parse_custom_source("天气|http://a|text|||| data.list[*].title, data.image")
+        assert source.extract_text(AI, "") == "AI资讯标题0\nAI资讯标题1"
+        assert source.extract_image_url(AI) == "https://example.com/ai.png"
+
+    def test_falls_back_to_walk(self):
+        source = ContentSource(name="x", label="x", api="http://a", text_paths=("data.nothing",))
+        assert source.extract_text({"data": {"date": "2026-10-18", "body": {"t": "正文"}}}, "") == "正文"
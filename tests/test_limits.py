@@ -0,0 +1,128 @@
+"""限流与熔断的单元测试：TokenBucket、CircuitBreaker 与查询指令的用户/群组限流。"""
+
+import pytest
+
+pytest.importorskip("astrbot")
+
+import main  # noqa: E402
+from main import CircuitBreaker, TokenBucket  # noqa: E402
+
+
+class FakeEvent:
+    def __init__(self, sender: str, group: str = ""):
+        self.sender = sender
+        self.group = group
+        self.unified_msg_origin = f"aiocqhttp:GroupMessage:{group}" if group else f"aiocqhttp:FriendMessage:{sender}"
+
+    def get_sender_id(self) -> str:
+        return self.sender
+
+    def get_group_id(self) -> str:
+        return self.group
+
+
+class TestTokenBucket:
+    def test_burst_then_empty(self):
+        bucket = TokenBucket(rate=0.01, burst=2)
+        assert bucket.try_acquire()
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+
+    def test_available_does_not_consume(self):
+        bucket = TokenBucket(rate=0.01, burst=1)
+        assert bucket.available()
+        assert bucket.available()
+        assert bucket.try_acquire()
+        assert not bucket.available()
+
+    def test_refills_over_time(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(main.time, "monotonic", lambda: now[0])
+        bucket = TokenBucket(rate=1, burst=1)
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+        now[0] += 1
+        assert bucket.try_acquire()
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == "closed"
+
+    @pytest.fixture
+    def half_open(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(main.time, "monotonic", lambda: now[0])
+        breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        now[0] += 59
+        assert not breaker.allow()
+        now[0] += 1
+        # 冷却结束后只放行一次试探请求
+        assert breaker.allow()
+        assert breaker.state == "half_open"
+        assert not breaker.allow()
+        return breaker, now
+
+    def test_half_open_probe_success_closes(self, half_open):
+        breaker, _ = half_open
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.allow()
+
+    def test_half_open_probe_failure_reopens(self, half_open):
+        breaker, now = half_open
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+        now[0] += 60
+        assert breaker.allow()
+
+
+class TestCommandThrottle:
+    def test_user_limit(self, make_plugin):
+        plugin = make_plugin(command_user_limit=2, command_group_limit=0)
+        assert plugin._command_allowed(FakeEvent("u1", "g1"))
+        assert plugin._command_allowed(FakeEvent("u1", "g2"))
+        assert not plugin._command_allowed(FakeEvent("u1", "g1"))
+        assert plugin._command_allowed(FakeEvent("u2", "g1"))
+
+    def test_group_limit_is_shared(self, make_plugin):
+        plugin = make_plugin(command_user_limit=0, command_group_limit=2)
+        assert plugin._command_allowed(FakeEvent("u1", "g1"))
+        assert plugin._command_allowed(FakeEvent("u2", "g1"))
+        assert not plugin._command_allowed(FakeEvent("u3", "g1"))
+        assert plugin._command_allowed(FakeEvent("u3", "g2"))
+        # 私聊没有群组额度
+        assert plugin._command_allowed(FakeEvent("u3"))
+
+    def test_rejected_request_keeps_user_tokens(self, make_plugin):
+        plugin = make_plugin(command_user_limit=1, command_group_limit=1)
+        assert plugin._command_allowed(FakeEvent("u1", "g1"))
+        assert not plugin._command_allowed(FakeEvent("u2", "g1"))
+        # u2 被群组额度拒绝时没有消耗自己的额度
+        assert plugin._command_allowed(FakeEvent("u2", "g2"))
+
+    def test_zero_disables(self, make_plugin):
+        plugin = make_plugin(command_user_limit=0, command_group_limit=0)
+        assert all(plugin._command_allowed(FakeEvent("u1", "g1")) for _ in range(50))
+        assert not plugin._command_buckets
+
+    def test_bucket_count_is_capped(self, make_plugin, monkeypatch):
+        monkeypatch.setattr(main, "THROTTLE_MAX_KEYS", 10)
+        plugin = make_plugin(command_user_limit=5, command_group_limit=0)
+        for i in range(30):
+            plugin._command_allowed(FakeEvent(f"u{i}"))
+        assert len(plugin._command_buckets) == 10
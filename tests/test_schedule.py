@@ -0,0 +1,70 @@
+"""调度堆的单元测试：构建推送与预拉取条目，以及配置变更后只重建受影响的条目。"""
+
+import pytest
+
+pytest.importorskip("astrbot")
+
+import main  # noqa: E402
+
+LEAD_MINUTES = 5
+
+
+def entries(heap, item, kind):
+    return sorted((e[4], e[5]) for e in heap if e[3] == item and e[2] == kind)
+
+
+def expected_prefetch(heap, item):
+    lead = LEAD_MINUTES * 60
+    return sorted((e[4], e[5]) for e in heap if e[3] == item and e[2] == "fire" and e[0] - lead > main.time.time())
+
+
+@pytest.fixture
+def plugin(make_plugin):
+    return make_plugin(news_push_time="08:00,12:00", moyu_push_time="09:30", prefetch_lead=LEAD_MINUTES)
+
+
+def test_build_schedule(plugin):
+    heap = plugin._build_schedule()
+    assert entries(heap, "news", "fire") == [(8, 0), (12, 0)]
+    assert entries(heap, "moyu", "fire") == [(9, 30)]
+    assert entries(heap, "news", "prefetch") == expected_prefetch(heap, "news")
+    assert heap[0] == min(heap)
+
+
+def test_reschedule_keeps_unchanged_entries(plugin):
+    heap = plugin._build_schedule()
+    kept_fire = next(e for e in heap if e[3] == "news" and e[2] == "fire" and (e[4], e[5]) == (12, 0))
+    others = sorted(e for e in heap if e[3] != "news")
+    plugin.config.news_push_time = "12:00,18:00"
+    plugin.sources = plugin._build_sources()
+    plugin._plan = plugin._build_plan()
+
+    heap = plugin._reschedule(list(heap), {"news"})
+
+    # 时间点未变的推送条目原样保留（含时间戳与序号），删除的时间点不再出现，新增的被补充
+    assert kept_fire in heap
+    assert entries(heap, "news", "fire") == [(12, 0), (18, 0)]
+    assert entries(heap, "news", "prefetch") == expected_prefetch(heap, "news")
+    # 其他内容的条目不受影响
+    assert sorted(e for e in heap if e[3] != "news") == others
+    assert heap[0] == min(heap)
+
+
+def test_reschedule_without_prefetch(plugin):
+    heap = plugin._build_schedule()
+    plugin.config.prefetch_lead = 0
+    heap = plugin._reschedule(list(heap), {"news", "moyu"})
+    assert not [e for e in heap if e[3] in ("news", "moyu") and e[2] == "prefetch"]
+    assert entries(heap, "news", "fire") == [(8, 0), (12, 0)]
+
+
+def test_reschedule_removed_source(make_plugin):
+    plugin = make_plugin(custom_sources=["天气|http://example.com/w|text|07:00"], prefetch_lead=LEAD_MINUTES)
+    heap = plugin._build_schedule()
+    assert entries(heap, "天气", "fire") == [(7, 0)]
+    plugin.config.custom_sources = []
+    plugin.sources = plugin._build_sources()
+    plugin._plan = plugin._build_plan()
+    heap = plugin._reschedule(list(heap), {"天气"})
+    assert not [e for e in heap if e[3] == "天气"]
+
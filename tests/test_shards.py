@@ -0,0 +1,78 @@
+"""ShardCoordinator 的单元测试：一致性哈希分配、目标认领与下线分片的接管。"""
+
+import pytest
+
+pytest.importorskip("astrbot")
+
+import main  # noqa: E402
+
+TARGETS = [f"aiocqhttp:GroupMessage:{i}" for i in range(40)]
+
+
+@pytest.fixture
+def shards(tmp_path):
+    path = str(tmp_path / "shards.db")
+    coordinators = [main.ShardCoordinator(path, i, 2) for i in range(2)]
+    for c in coordinators:
+        c.heartbeat()
+    yield coordinators
+    for c in coordinators:
+        c.close()
+
+
+def test_owned_partitions_targets(shards):
+    a, b = (set(c.owned(TARGETS)) for c in shards)
+    assert a and b
+    assert not a & b
+    assert a | b == set(TARGETS)
+
+
+def test_owned_reassigns_only_dead_shard_targets(tmp_path):
+    path = str(tmp_path / "shards.db")
+    coordinators = [main.ShardCoordinator(path, i, 3) for i in range(3)]
+    for c in coordinators:
+        c.heartbeat()
+    first, second, third = coordinators
+    before = [set(c.owned(TARGETS)) for c in (second, third)]
+    first.leave()
+    after = [set(c.owned(TARGETS)) for c in (second, third)]
+    # 存活分片保留原有目标，只分走下线分片的目标
+    assert before[0] <= after[0] and before[1] <= after[1]
+    assert not after[0] & after[1]
+    assert after[0] | after[1] == set(TARGETS)
+    for c in coordinators:
+        c.close()
+
+
+def test_claim_is_exclusive_while_owner_is_alive(shards):
+    first, second = shards
+    assert first.claim("news", "2026-10-18", "08:00", TARGETS[:5]) == TARGETS[:5]
+    assert second.claim("news", "2026-10-18", "08:00", TARGETS[:5]) == []
+    # 本实例再次认领时仍返回自己尚未送达的目标
+    assert first.claim("news", "2026-10-18", "08:00", TARGETS[:5]) == TARGETS[:5]
+
+
+def test_claim_takes_over_undone_targets_of_dead_shard(shards):
+    first, second = shards
+    first.claim("news", "2026-10-18", "08:00", TARGETS[:5])
+    first.complete("news", "2026-10-18", "08:00", TARGETS[:2])
+    first.leave()
+    # 已送达的目标不会被重新认领，未送达的由存活分片接管
+    assert second.claim("news", "2026-10-18", "08:00", TARGETS[:5]) == TARGETS[2:5]
+
+
+def test_claim_takes_over_after_heartbeat_timeout(shards, monkeypatch):
+    first, second = shards
+    first.claim("news", "2026-10-18", "08:00", TARGETS[:3])
+    now = main.time.time()
+    monkeypatch.setattr(main.time, "time", lambda: now + main.SHARD_DEAD_AFTER + 1)
+    second.heartbeat()
+    assert second.live_shards() == frozenset({1})
+    assert second.claim("news", "2026-10-18", "08:00", TARGETS[:3]) == TARGETS[:3]
+
+
+def test_claims_are_scoped_by_item_and_slot(shards):
+    first, second = shards
+    first.claim("news", "2026-10-18", "08:00", TARGETS[:3])
+    assert second.claim("moyu", "2026-10-18", "08:00", TARGETS[:3]) == TARGETS[:3]
+    assert second.claim("news", "2026-10-18", "12:00", TARGETS[:3]) == TARGETS[:3]